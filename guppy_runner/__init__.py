@@ -1,44 +1,48 @@
 """Guppy Runner."""
 
+from __future__ import annotations
+
+import dataclasses
+import os
 import sys
 from argparse import ArgumentParser, Namespace
-from pathlib import Path
-
-from guppylang.module import GuppyModule  # type: ignore
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, cast
 
-from guppy_runner.compile import CompilerError
+from guppy_runner.cache import ArtifactCache, cache_enabled
+from guppy_runner.compile import CompilerError, StageCompiler, ToolCompiler
 from guppy_runner.compile.guppy_compiler import GuppyCompiler
 from guppy_runner.compile.hugr_compiler import HugrCompiler
 from guppy_runner.compile.linker import Linker
 from guppy_runner.compile.llvm_compiler import LlvmCompiler
 from guppy_runner.compile.mlir_compiler import MLIRCompiler
 from guppy_runner.compile.mlir_lowerer import MLIRLowerer
+from guppy_runner.compile.pipeline import pipeline_segments, run_piped
 from guppy_runner.run import run_guppy_bin
 from guppy_runner.stage import EncodingMode, Stage, StageData
 from guppy_runner.util import LOGGER
 
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from pathlib import Path
+
+    from guppylang.module import GuppyModule  # type: ignore
+
 __all__ = [
+    "RunOptions",
     "run_guppy",
     "run_guppy_str",
+    "run_guppy_module",
     "run_guppy_from_stage",
+    "compile_guppy_from_stage",
+    "compile_guppy_many",
 ]
 
 
-def run_guppy(  # noqa: PLR0913
-    guppy_path: Path,
-    *,
-    hugr_out: Path | None = None,
-    hugr_mlir_out: Path | None = None,
-    lowered_mlir_out: Path | None = None,
-    llvm_out: Path | None = None,
-    obj_out: Path | None = None,
-    bin_out: Path | None = None,
-    no_run: bool = False,
-    module_name: str | None = None,
-) -> bool:
-    """Compile and run a Guppy program.
+@dataclass(frozen=True, slots=True)
+class RunOptions:
+    """Options for compiling and running a Guppy program.
 
-    :param guppy_path: The Guppy program path to run.
     :param hugr_out: Optional. If provided, write the compiled Hugr to this file.
         The file extension determines the encoding mode (json or msgpack).
     :param hugr_mlir_out: Optional. If provided, write the hugr-dialect MLIR to this
@@ -46,252 +50,299 @@ def run_guppy(  # noqa: PLR0913
     :param lowered_mlir_out: Optional. If provided, write the llvm-dialect MLIR to this
         file.
     :param llvm_out: Optional. If provided, write the compiled LLVMIR to this file.
+    :param obj_out: Optional. If provided, write the compiled object to this
+        file.
+    :param bin_out: Optional. If provided, write the compiled binary to this
+        file.
     :param no_run: Optional. If True, do not run the compiled artifact.
         The compilation will terminate after producing the required intermediary files.
     :param module_name: Optional. The name of the module to load. By default,
         compiles the module used by @guppy.
-    :return: Whether the program ran successfully.
+    :param pipeline: Optional. If True, run the MLIR and LLVM compilation stages
+        concurrently, streaming the intermediary artifacts between them.
     """
-    stage_data = StageData.from_path(
-        Stage.GUPPY,
-        guppy_path,
-        EncodingMode.TEXTUAL,
-    )
 
-    return run_guppy_from_stage(
-        stage_data,
-        hugr_out=hugr_out,
-        hugr_mlir_out=hugr_mlir_out,
-        lowered_mlir_out=lowered_mlir_out,
-        llvm_out=llvm_out,
-        obj_out=obj_out,
-        bin_out=bin_out,
-        no_run=no_run,
-        module_name=module_name,
-    )
+    hugr_out: Path | None = None
+    hugr_mlir_out: Path | None = None
+    lowered_mlir_out: Path | None = None
+    llvm_out: Path | None = None
+    obj_out: Path | None = None
+    bin_out: Path | None = None
+    no_run: bool = False
+    module_name: str | None = None
+    pipeline: bool = False
 
 
-def run_guppy_str(  # noqa: PLR0913
-    guppy_program: str,
-    *,
-    hugr_out: Path | None = None,
-    hugr_mlir_out: Path | None = None,
-    lowered_mlir_out: Path | None = None,
-    llvm_out: Path | None = None,
-    obj_out: Path | None = None,
-    bin_out: Path | None = None,
-    no_run: bool = False,
-    module_name: str | None = None,
+# The compilers for each stage of the pipeline, in order.
+#
+# The compilers hold no per-invocation state, so they can be shared between runs.
+_PIPELINE = (
+    GuppyCompiler(),
+    HugrCompiler(),
+    MLIRLowerer(),
+    MLIRCompiler(),
+    LlvmCompiler(),
+    Linker(),
+)
+
+
+def run_guppy(
+    guppy_path: Path,
+    options: RunOptions | None = None,
+    **kwargs,
 ) -> bool:
     """Compile and run a Guppy program.
 
-    :param guppy_program: The Guppy program to run.
-    :param hugr_out: Optional. If provided, write the compiled Hugr to this file.
-        The file extension determines the encoding mode (json or msgpack).
-    :param hugr_mlir_out: Optional. If provided, write the hugr-dialect MLIR to this
-        file.
-    :param lowered_mlir_out: Optional. If provided, write the llvm-dialect MLIR to this
-        file.
-    :param llvm_out: Optional. If provided, write the compiled LLVMIR to this file.
-    :param obj_out: Optional. If provided, write the compiled object to this
-        file.
-    :param bin_out: Optional. If provided, write the compiled binary to this
-        file.
-    :param no_run: Optional. If True, do not run the compiled artifact.
-        The compilation will terminate after producing the required intermediary files.
-    :param module_name: Optional. The name of the module to load. By default,
-        compiles the module used by @guppy.
+    :param guppy_path: The Guppy program path to run.
+    :param options: Optional. The compilation options. Individual options may
+        also be given as keyword arguments, see `RunOptions`.
     :return: Whether the program ran successfully.
     """
-    stage_data = StageData(
-        Stage.GUPPY,
-        guppy_program,
-        EncodingMode.TEXTUAL,
-    )
-
-    return run_guppy_from_stage(
-        stage_data,
-        hugr_out=hugr_out,
-        hugr_mlir_out=hugr_mlir_out,
-        lowered_mlir_out=lowered_mlir_out,
-        llvm_out=llvm_out,
-        obj_out=obj_out,
-        bin_out=bin_out,
-        no_run=no_run,
-        module_name=module_name,
-    )
+    stage_data = StageData.from_path(Stage.GUPPY, guppy_path, EncodingMode.TEXTUAL)
+    return run_guppy_from_stage(stage_data, options, **kwargs)
 
 
-def run_guppy_module(  # noqa: PLR0913
-    module: GuppyModule,
-    *,
-    hugr_out: Path | None = None,
-    hugr_mlir_out: Path | None = None,
-    lowered_mlir_out: Path | None = None,
-    llvm_out: Path | None = None,
-    obj_out: Path | None = None,
-    bin_out: Path | None = None,
-    no_run: bool = False,
-    module_name: str | None = None,
+def run_guppy_str(
+    guppy_program: str,
+    options: RunOptions | None = None,
+    **kwargs,
 ) -> bool:
     """Compile and run a Guppy program.
 
     :param guppy_program: The Guppy program to run.
-    :param hugr_out: Optional. If provided, write the compiled Hugr to this file.
-        The file extension determines the encoding mode (json or msgpack).
-    :param hugr_mlir_out: Optional. If provided, write the hugr-dialect MLIR to this
-        file.
-    :param lowered_mlir_out: Optional. If provided, write the llvm-dialect MLIR to this
-        file.
-    :param llvm_out: Optional. If provided, write the compiled LLVMIR to this file.
-    :param obj_out: Optional. If provided, write the compiled object to this
-        file.
-    :param bin_out: Optional. If provided, write the compiled binary to this
-        file.
-    :param no_run: Optional. If True, do not run the compiled artifact.
-        The compilation will terminate after producing the required intermediary files.
-    :param module_name: Optional. The name of the module to load. By default,
-        compiles the module used by @guppy.
+    :param options: Optional. The compilation options. Individual options may
+        also be given as keyword arguments, see `RunOptions`.
     :return: Whether the program ran successfully.
     """
-    hugr = module.compile()
-    serial_hugr = hugr.serialize()
+    stage_data = StageData(Stage.GUPPY, guppy_program, EncodingMode.TEXTUAL)
+    return run_guppy_from_stage(stage_data, options, **kwargs)
 
-    stage_data = StageData(
-        Stage.HUGR,
-        serial_hugr,
-        EncodingMode.BITCODE,
-    )
 
-    return run_guppy_from_stage(
-        stage_data,
-        hugr_out=hugr_out,
-        hugr_mlir_out=hugr_mlir_out,
-        lowered_mlir_out=lowered_mlir_out,
-        llvm_out=llvm_out,
-        obj_out=obj_out,
-        bin_out=bin_out,
-        no_run=no_run,
-        module_name=module_name,
-    )
+def run_guppy_module(
+    module: GuppyModule,
+    options: RunOptions | None = None,
+    **kwargs,
+) -> bool:
+    """Compile and run a Guppy module.
+
+    :param module: The Guppy module to run.
+    :param options: Optional. The compilation options. Individual options may
+        also be given as keyword arguments, see `RunOptions`.
+    :return: Whether the program ran successfully.
+    """
+    hugr = module.compile()
+    stage_data = StageData(Stage.HUGR, hugr.serialize(), EncodingMode.BITCODE)
+    return run_guppy_from_stage(stage_data, options, **kwargs)
 
 
-def run_guppy_from_stage(  # noqa: PLR0913
+def run_guppy_from_stage(
     program: StageData,
-    *,
-    hugr_out: Path | None = None,
-    hugr_mlir_out: Path | None = None,
-    lowered_mlir_out: Path | None = None,
-    llvm_out: Path | None = None,
-    obj_out: Path | None = None,
-    bin_out: Path | None = None,
-    no_run: bool = False,
-    module_name: str | None = None,
+    options: RunOptions | None = None,
+    **kwargs,
 ) -> bool:
     """Compile and run a Guppy program, from a given compilation stage.
 
-    :param guppy_program: The program to run. If an intermediary stage is given,
+    Compiled artifacts are cached on disk, keyed by the compiled Hugr and the
+    compiler configuration. The Guppy front-end always runs.
+    Set the `GUPPY_CACHE=0` env variable to disable the cache.
+
+    :param program: The program to run. If an intermediary stage is given,
         start compilation from that stage.
-    :param hugr_out: Optional. If provided, write the compiled Hugr to this
-        file. The file extension determines the encoding mode (json or msgpack).
-    :param hugr_mlir_out: Optional. If provided, write the hugr-dialect MLIR to this
-        file.
-    :param lowered_mlir_out: Optional. If provided, write the llvm-dialect MLIR to this
-        file.
-    :param llvm_out: Optional. If provided, write the compiled LLVMIR to this
-        file.
-    :param obj_out: Optional. If provided, write the compiled object to this
-        file.
-    :param bin_out: Optional. If provided, write the compiled binary to this
-        file.
-    :param no_run: Optional. If True, do not run the compiled artifact. The
-        compilation will terminate after producing the required intermediary
-        files.
-    :param module_name: Optional. The name of the module to load. By default,
-        compiles the module used by @guppy.
+    :param options: Optional. The compilation options. Individual options may
+        also be given as keyword arguments, see `RunOptions`.
     :return: Whether the program ran successfully.
     """
-    compilers = [
-        GuppyCompiler(),
-        HugrCompiler(),
-        MLIRLowerer(),
-        MLIRCompiler(),
-        LlvmCompiler(),
-        Linker(),
+    options = _merge_options(options, kwargs)
+    compiled = compile_guppy_from_stage(program, options)
+    if compiled is None:
+        return False
+
+    if not options.no_run:
+        assert compiled.stage == Stage.EXECUTABLE
+        assert compiled.data_path
+
+        run_guppy_bin(compiled.data_path)
+
+    return True
+
+
+def compile_guppy_from_stage(
+    program: StageData,
+    options: RunOptions | None = None,
+    **kwargs,
+) -> StageData | None:
+    """Compile a Guppy program from a given compilation stage, without running it.
+
+    Produces an executable, unless `no_run` is set. In that case the compilation
+    stops after producing the requested intermediary artifacts.
+
+    :param program: The program to compile. If an intermediary stage is given,
+        start compilation from that stage.
+    :param options: Optional. The compilation options. Individual options may
+        also be given as keyword arguments, see `RunOptions`.
+    :return: The last compiled artifact, or None if the compilation failed.
+    """
+    options = _merge_options(options, kwargs)
+
+    stages = [
+        (compiler, getattr(options, compiler.OUTPUT_KEY)) for compiler in _PIPELINE
     ]
+
+    target = _target_stage(program, options, stages)
+
+    # Skip stages that are not required.
+    # (e.g. if we give an intermediary artifact as input)
+    stages = [
+        (compiler, output_file)
+        for compiler, output_file in stages
+        if program.stage <= compiler.INPUT_STAGE
+    ]
+    if options.pipeline:
+        segments = pipeline_segments(stages)
+    else:
+        segments = [[stage] for stage in stages]
+
+    # The cache is only used once the program has been compiled into a Hugr.
+    use_cache = cache_enabled()
+    cache = None
+    # Intermediary artifacts left in temporary files by the piped segments.
+    temp_files: list[Path] = []
+    result = None
+    try:
+        for segment in segments:
+            if program.stage >= target:
+                break
+            if use_cache and cache is None and program.stage >= Stage.HUGR:
+                cache = _pipeline_cache(program)
+            program = _run_segment(segment, program, options, cache)
+            if len(segment) > 1 and segment[-1][1] is None:
+                assert program.data_path is not None
+                temp_files.append(program.data_path)
+        result = program
+    except CompilerError as err:
+        LOGGER.error(err)
+    finally:
+        # The cache may still be copying the temporary files.
+        if cache is not None:
+            cache.flush()
+        _remove_temp_files(temp_files, result)
+
+    return result
+
+
+def compile_guppy_many(
+    programs: Sequence[StageData],
+    options: Sequence[RunOptions],
+) -> list[StageData | None]:
+    """Compile multiple independent Guppy programs, without running them.
+
+    The programs are compiled concurrently, so while one program is being
+    translated by an external tool the next ones can advance through the
+    previous stages. The Guppy front-end processes one program at a time.
+
+    :param programs: The programs to compile.
+    :param options: The compilation options for each program. The
+        artifacts of each program must be stored in distinct files, and each
+        program must set `no_run` or a `bin_out` path.
+    :return: The last compiled artifact of each program, in order, or None for
+        the programs that failed to compile.
+    """
+    if len(options) != len(programs):
+        msg = "Expected one set of options per program."
+        raise ValueError(msg)
+
     output_files = [
-        hugr_out,
-        hugr_mlir_out,
-        lowered_mlir_out,
-        llvm_out,
-        obj_out,
-        bin_out,
+        output_file
+        for opts in options
+        for compiler in _PIPELINE
+        if (output_file := getattr(opts, compiler.OUTPUT_KEY)) is not None
     ]
+    if len(set(output_files)) != len(output_files):
+        msg = "The programs must store their artifacts in distinct files."
+        raise ValueError(msg)
+    if any(not opts.no_run and opts.bin_out is None for opts in options):
+        msg = "Programs compiled to an executable must set a `bin_out` path."
+        raise ValueError(msg)
 
-    for compiler, output_file in zip(compilers, output_files, strict=True):
-        if _are_we_done(
-            program.stage,
-            hugr_out=hugr_out,
-            hugr_mlir_out=hugr_mlir_out,
-            lowered_mlir_out=lowered_mlir_out,
-            llvm_out=llvm_out,
-            obj_out=obj_out,
-            bin_out=bin_out,
-            no_run=no_run,
-        ):
-            break
-
-        # Skip stages that are not required.
-        # (e.g. if we give an intermediary artifact as input)
-        if program.stage == compiler.INPUT_STAGE:
-            LOGGER.info(
-                "Compiling %s -> %s",
-                compiler.INPUT_STAGE,
-                compiler.OUTPUT_STAGE,
-            )
-            try:
-                program = compiler.run(
-                    program,
-                    output_file=output_file,
-                    module_name=module_name,
-                )
-            except CompilerError as err:
-                LOGGER.error(err)
-                return False
-
-    if not no_run:
-        assert program.stage == Stage.EXECUTABLE
-        assert program.data_path
-
-        run_guppy_bin(program.data_path)
+    from concurrent.futures import ThreadPoolExecutor
 
-    return True
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        return list(executor.map(compile_guppy_from_stage, programs, options))
 
 
-def _are_we_done(  # noqa: PLR0913, PLR0911
-    stage: Stage,
-    *,
-    hugr_out: Path | None = None,
-    hugr_mlir_out: Path | None = None,
-    lowered_mlir_out: Path | None = None,
-    llvm_out: Path | None = None,
-    obj_out: Path | None = None,
-    bin_out: Path | None = None,
-    no_run: bool = False,
-) -> bool:
-    """Returns 'true' if we can stop the execution early."""
-    if not no_run:
-        return False
-    if hugr_out and stage < Stage.HUGR:
-        return False
-    if hugr_mlir_out and stage < Stage.HUGR_MLIR:
-        return False
-    if lowered_mlir_out and stage < Stage.LOWERED_MLIR:
-        return False
-    if llvm_out and stage < Stage.LLVM:
-        return False
-    if obj_out and stage < Stage.OBJECT:
-        return False
-    if bin_out and stage < Stage.EXECUTABLE:
-        return False
-    return True
+def _merge_options(options: RunOptions | None, kwargs: dict) -> RunOptions:
+    """Returns the compilation options, updated with any keyword arguments."""
+    if options is None:
+        return RunOptions(**kwargs)
+    if kwargs:
+        return dataclasses.replace(options, **kwargs)
+    return options
+
+
+def _target_stage(
+    program: StageData,
+    options: RunOptions,
+    stages: list[tuple[StageCompiler, Path | None]],
+) -> Stage:
+    """Returns the last stage we need to produce."""
+    if not options.no_run:
+        return Stage.EXECUTABLE
+    return max(
+        (compiler.OUTPUT_STAGE for compiler, output_file in stages if output_file),
+        default=program.stage,
+    )
+
+
+def _pipeline_cache(program: StageData) -> ArtifactCache:
+    """Returns the cache for the artifacts compiled from a Hugr or a later stage.
+
+    Guppy programs are not cached, since they may depend on any imported module or
+    on their environment. Instead, the artifacts are keyed by the compiled Hugr and
+    the compilers that process it.
+    """
+    compilers = [c for c in _PIPELINE if program.stage <= c.INPUT_STAGE]
+    return ArtifactCache.for_pipeline(program, compilers)
+
+
+def _remove_temp_files(temp_files: list[Path], result: StageData | None) -> None:
+    """Remove the temporary artifacts produced while compiling a program.
+
+    If the returned artifact is one of them, it is loaded in memory first.
+    """
+    for path in temp_files:
+        if result is not None and result.data_path == path:
+            result.load_data()
+            result.data_path = None
+        path.unlink(missing_ok=True)
+
+
+def _run_segment(
+    segment: list[tuple[StageCompiler, Path | None]],
+    program: StageData,
+    options: RunOptions,
+    cache: ArtifactCache | None,
+) -> StageData:
+    """Run a segment of the compilation pipeline.
+
+    Segments with multiple compilers are run concurrently as a process pipeline.
+    """
+    compiler = segment[0][0]
+    LOGGER.info(
+        "Compiling %s -> %s",
+        compiler.INPUT_STAGE,
+        segment[-1][0].OUTPUT_STAGE,
+    )
+    if len(segment) == 1:
+        return compiler.run(
+            program,
+            output_file=segment[0][1],
+            module_name=options.module_name,
+            cache=cache,
+        )
+    # `pipeline_segments` only groups `ToolCompiler`s.
+    return run_piped(
+        [cast("ToolCompiler", c) for c, _ in segment],
+        program,
+        output_file=segment[-1][1],
+        cache=cache,
+    )
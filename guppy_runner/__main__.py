@@ -8,12 +8,15 @@ The execution is composed of three steps:
     - Produce a runnable artifact from the LLVMIR file and the `qir-runner` runtime.
 """
 
+import functools
 import logging
 import sys
 from argparse import ArgumentParser, Namespace
+from dataclasses import fields
 from pathlib import Path
 
-from guppy_runner import run_guppy_from_stage
+from guppy_runner import RunOptions, compile_guppy_from_stage
+from guppy_runner.run import exec_guppy_bin
 from guppy_runner.stage import (
     EncodingMode,
     Stage,
@@ -21,9 +24,24 @@ from guppy_runner.stage import (
 )
 from guppy_runner.util import LOGGER
 
+# The `--store-*` argument destinations, and the stage of the stored artifact.
+# Sorted by stage.
+_STORE_ARGS = (
+    ("hugr_out", Stage.HUGR),
+    ("hugr_mlir_out", Stage.HUGR_MLIR),
+    ("lowered_mlir_out", Stage.LOWERED_MLIR),
+    ("llvm_out", Stage.LLVM),
+    ("obj_out", Stage.OBJECT),
+    ("bin_out", Stage.EXECUTABLE),
+)
+
+
+@functools.cache
+def arg_parser() -> ArgumentParser:
+    """Returns a parser for the command line arguments.
 
-def parse_args() -> Namespace:
-    """Returns a parser for the command line arguments."""
+    The parser is only built once, and reused on subsequent calls.
+    """
     parser = ArgumentParser(
         description="Execute a Guppy program using the qir-runner backend.",
     )
@@ -61,7 +79,7 @@ def parse_args() -> Namespace:
         action="store_true",
         help="Read the input as an encoded Hugr.\n"
         "The input file extension determines whether the file is encoded in msgpack or "
-        "json. Use `--bitcode` to `--textual` to override this.",
+        "json, defaulting to msgpack. Use `--bitcode` to `--textual` to override this.",
     )
     input_mode.add_argument(
         "--hugr-mlir",
@@ -100,13 +118,16 @@ def parse_args() -> Namespace:
     artifacts = parser.add_argument_group("Intermediary artifact outputs")
     artifacts.add_argument(
         "--store-hugr",
+        dest="hugr_out",
         type=Path,
         metavar="HUGR_OUTPUT[.msgpack|.json]",
         help="Store the intermediary Hugr object. "
-        "The file extension determines whether the file is encoded in msgpack or json.",
+        "The file extension determines whether the file is encoded in msgpack or json. "
+        "Defaults to msgpack if the extension is not recognized.",
     )
     artifacts.add_argument(
         "--store-hugr-mlir",
+        dest="hugr_mlir_out",
         type=Path,
         metavar="MLIR.mlir",
         help="Store the intermediary hugr-dialect MLIR object. "
@@ -115,6 +136,7 @@ def parse_args() -> Namespace:
     )
     artifacts.add_argument(
         "--store-llvm-mlir",
+        dest="lowered_mlir_out",
         type=Path,
         metavar="MLIR.mlir",
         help="Store the intermediary llvm-dialect MLIR object. "
@@ -123,6 +145,7 @@ def parse_args() -> Namespace:
     )
     artifacts.add_argument(
         "--store-llvm",
+        dest="llvm_out",
         type=Path,
         metavar="LLVM.ll",
         help="Store the intermediary LLVMIR object."
@@ -131,12 +154,14 @@ def parse_args() -> Namespace:
     )
     artifacts.add_argument(
         "--store-obj",
+        dest="obj_out",
         type=Path,
         metavar="OBJ.o",
         help="Store the intermediary object file.",
     )
     artifacts.add_argument(
         "--store-bin",
+        dest="bin_out",
         type=Path,
         metavar="a.out",
         help="Store the executable binary.",
@@ -159,8 +184,24 @@ def parse_args() -> Namespace:
         "`guppy-runner` will produce any required intermediary files, "
         "and terminate early.",
     )
+    runnable.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Run the MLIR and LLVM compilation stages concurrently, streaming the "
+        "intermediary artifacts between them. "
+        "Stages whose artifacts are stored are still run sequentially.",
+    )
+
+    return parser
+
 
-    args = parser.parse_args()
+def parse_args(argv: list[str] | None = None) -> Namespace:
+    """Parse and validate the command line arguments.
+
+    :param argv: Optional. The arguments to parse. Defaults to `sys.argv[1:]`.
+    """
+    parser = arg_parser()
+    args = parser.parse_args(argv)
     args.input_stage = get_input_state(args)
     args.input_encoding = get_input_encoding(args)
     validate_args(args, parser)
@@ -210,27 +251,32 @@ def get_input_encoding(args: Namespace) -> EncodingMode:
 
 def validate_args(args: Namespace, parser: ArgumentParser) -> None:
     """Validate whether can produce the intermediary artifacts from the input."""
-    store_requires = [
-        (args.store_hugr, Stage.HUGR),
-        (args.store_hugr_mlir, Stage.HUGR_MLIR),
-        (args.store_llvm_mlir, Stage.LOWERED_MLIR),
-        (args.store_llvm, Stage.LLVM),
-        (args.store_obj, Stage.OBJECT),
-        (args.store_bin, Stage.EXECUTABLE),
-    ]
-
-    for store, stage in store_requires:
-        if store is not None and args.input_stage >= stage:
+    for dest, stage in _STORE_ARGS:
+        if args.input_stage < stage:
+            # The remaining artifacts are produced after the input stage.
+            break
+        if getattr(args, dest) is not None:
             parser.error(
                 f"Cannot produce a {stage.name} artifact from the given input.",
             )
 
 
+def get_run_options(args: Namespace) -> RunOptions:
+    """The compilation options set in the command line arguments.
+
+    The argument destinations match the `RunOptions` field names.
+    """
+    return RunOptions(
+        **{field.name: getattr(args, field.name) for field in fields(RunOptions)},
+    )
+
+
 def main() -> None:
     """Main entry point for the console script."""
     args = parse_args()
 
-    if args.verbose:
+    # Don't reconfigure logging if the host application already did.
+    if args.verbose and not logging.getLogger().handlers:
         logging.basicConfig(level=logging.INFO)
 
     if args.input:
@@ -245,21 +291,18 @@ def main() -> None:
             args.input_encoding,
         )
 
-    success = run_guppy_from_stage(
-        stage_data,
-        hugr_out=args.store_hugr,
-        hugr_mlir_out=args.store_hugr_mlir,
-        lowered_mlir_out=args.store_llvm_mlir,
-        llvm_out=args.store_llvm,
-        obj_out=args.store_obj,
-        bin_out=args.store_bin,
-        no_run=args.no_run,
-        module_name=args.module_name,
-    )
+    options = get_run_options(args)
+    program = compile_guppy_from_stage(stage_data, options)
 
-    if not success:
+    if program is None:
         sys.exit(1)
 
+    if not options.no_run:
+        assert program.data_path
+        # There is nothing left to do after the program runs,
+        # so hand over the process to it instead of waiting.
+        exec_guppy_bin(program.data_path)
+
 
 if __name__ == "__main__":
     main()
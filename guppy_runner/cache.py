@@ -0,0 +1,242 @@
+"""A content-addressed on-disk cache for compilation artifacts.
+
+Artifacts are stored under `$XDG_CACHE_HOME/guppy_runner/<key[:2]>/<key[2:]>/`, where
+the key is a hash of the compiled Hugr (or a later-stage input program) and the
+configuration of the following compilation stages.
+Guppy programs themselves are not cached, since they may depend on arbitrary
+Python modules and their environment.
+Set the `GUPPY_CACHE=0` environment variable to disable the cache.
+
+The cache is bounded by `GUPPY_CACHE_MAX_SIZE` bytes (1 GiB by default). When it
+grows past that size, the least recently used entries are removed.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from guppy_runner.util import LOGGER
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+    from guppy_runner.compile import StageCompiler
+    from guppy_runner.stage import EncodingMode, Stage, StageData
+
+GUPPY_CACHE_ENV = "GUPPY_CACHE"
+XDG_CACHE_HOME_ENV = "XDG_CACHE_HOME"
+GUPPY_CACHE_MAX_SIZE_ENV = "GUPPY_CACHE_MAX_SIZE"
+
+DEFAULT_CACHE_MAX_SIZE = 1 << 30
+
+
+def cache_enabled() -> bool:
+    """Returns whether the artifact cache is enabled.
+
+    The cache is enabled by default, unless the `GUPPY_CACHE` env variable is set
+    to "0".
+    """
+    return os.environ.get(GUPPY_CACHE_ENV, "1") != "0"
+
+
+def default_cache_dir() -> Path:
+    """Returns the root directory for the cached artifacts."""
+    if XDG_CACHE_HOME_ENV in os.environ:
+        return Path(os.environ[XDG_CACHE_HOME_ENV]) / "guppy_runner"
+    return Path.home() / ".cache" / "guppy_runner"
+
+
+def cache_max_size() -> int:
+    """Returns the maximum size of the cache directory, in bytes.
+
+    Set via the `GUPPY_CACHE_MAX_SIZE` env variable. Defaults to 1 GiB.
+    """
+    value = os.environ.get(GUPPY_CACHE_MAX_SIZE_ENV)
+    if value is None:
+        return DEFAULT_CACHE_MAX_SIZE
+    try:
+        return int(value)
+    except ValueError:
+        LOGGER.warning(
+            "Invalid %s value '%s', using the default.",
+            GUPPY_CACHE_MAX_SIZE_ENV,
+            value,
+        )
+        return DEFAULT_CACHE_MAX_SIZE
+
+
+def prune_cache(root: Path, max_size: int, keep: Path | None = None) -> None:
+    """Remove the least recently used cache entries until the cache fits in size.
+
+    Entries are ordered by the modification time of their directory, which is
+    updated whenever an entry is written or used.
+
+    :param root: The root cache directory.
+    :param max_size: The maximum total size of the entries, in bytes.
+    :param keep: Optional. An entry to never remove, such as the one in use.
+    """
+    entries: list[tuple[int, int, Path]] = []
+    for shard in _scandir(root):
+        for entry in _scandir(Path(shard.path)):
+            with contextlib.suppress(OSError):
+                size = sum(f.stat().st_size for f in _scandir(Path(entry.path)))
+                entries.append((entry.stat().st_mtime_ns, size, Path(entry.path)))
+
+    # Keep the most recently used entries that fit.
+    entries.sort(reverse=True)
+    total = 0
+    for _, size, path in entries:
+        total += size
+        if total > max_size and path != keep:
+            LOGGER.info("Removing cache entry '%s'", path)
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _scandir(path: Path) -> list[os.DirEntry[str]]:
+    """List the subdirectories or files in a cache directory, ignoring errors."""
+    try:
+        with os.scandir(path) as it:
+            return list(it)
+    except OSError:
+        return []
+
+
+def compute_cache_key(
+    program: StageData,
+    compilers: Iterable[StageCompiler],
+) -> str:
+    """Compute the cache key for compiling a program with a series of compilers.
+
+    The key depends on the program contents, its stage and encoding, and the
+    signatures of the compilers.
+    """
+    # BLAKE2 is considerably faster than SHA-256 on large payloads, and a
+    # 128-bit digest is plenty for a cache key.
+    hasher = hashlib.blake2b(digest_size=16)
+    data = program.data
+    hasher.update(data.encode() if isinstance(data, str) else data)
+
+    parts = [
+        program.stage.name,
+        program.encoding.name,
+        *(compiler.signature() for compiler in compilers),
+    ]
+    for part in parts:
+        hasher.update(b"\0")
+        hasher.update(part.encode())
+    return hasher.hexdigest()
+
+
+class ArtifactCache:
+    """The cached artifacts produced while compiling a single input program."""
+
+    key: str
+    root: Path
+    path: Path
+
+    _executor: ThreadPoolExecutor | None
+    _pending: list[Future[None]]
+    _used: bool
+
+    def __init__(self, key: str, root: Path | None = None) -> None:
+        """Initialize the cache entry.
+
+        :param key: The cache key, as computed by `compute_cache_key`.
+        :param root: Optional. The root cache directory. Defaults to
+            `default_cache_dir()`.
+        """
+        self.key = key
+        self.root = root or default_cache_dir()
+        # Shard the entries by key prefix, to keep the directories small.
+        self.path = self.root / key[:2] / key[2:]
+        self._executor = None
+        self._pending = []
+        self._used = False
+
+    @classmethod
+    def for_pipeline(
+        cls,
+        program: StageData,
+        compilers: Iterable[StageCompiler],
+    ) -> ArtifactCache:
+        """Returns the cache entry for compiling `program` with `compilers`."""
+        return cls(compute_cache_key(program, compilers))
+
+    def lookup(self, stage: Stage, encoding: EncodingMode) -> Path | None:
+        """Returns the path to a cached artifact, if it exists."""
+        path = self._artifact_path(stage, encoding)
+        if not path.is_file():
+            return None
+        LOGGER.info("Using cached %s artifact '%s'", stage.name, path)
+        if not self._used:
+            # Mark the entry as recently used, so it is pruned last.
+            with contextlib.suppress(OSError):
+                os.utime(self.path)
+            self._used = True
+        return path
+
+    def store(self, data: StageData) -> None:
+        """Store an artifact in the cache.
+
+        The artifact is written in a background thread, so the following stages
+        can start compiling in the meantime. Call `flush` to wait for all the
+        pending writes.
+
+        Errors while writing to the cache are logged and otherwise ignored.
+        """
+        if self._executor is None:
+            # Imported here to keep it out of the CLI startup time.
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending.append(self._executor.submit(self._write, data))
+
+    def flush(self) -> None:
+        """Wait until all the stored artifacts have been written.
+
+        If any artifacts were stored, prune the cache back to `cache_max_size()`.
+        """
+        for future in self._pending:
+            future.result()
+        self._pending.clear()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+            prune_cache(self.root, cache_max_size(), keep=self.path)
+
+    def _write(self, data: StageData) -> None:
+        target = self._artifact_path(data.stage, data.encoding)
+        tmp_path = None
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first, so concurrent runs never observe
+            # a partially written artifact.
+            fd, tmp_name = tempfile.mkstemp(dir=self.path, prefix=".tmp")
+            os.close(fd)
+            tmp_path = Path(tmp_name)
+            if data.data_path is not None:
+                shutil.copy(data.data_path, tmp_path)
+            elif isinstance(data.data, str):
+                tmp_path.write_text(data.data)
+            else:
+                tmp_path.write_bytes(data.data)
+            tmp_path.replace(target)
+        except OSError as err:
+            if tmp_path is not None:
+                with contextlib.suppress(OSError):
+                    tmp_path.unlink()
+            LOGGER.warning(
+                "Could not store %s artifact in the cache: %s",
+                data.stage.name,
+                err,
+            )
+
+    def _artifact_path(self, stage: Stage, encoding: EncodingMode) -> Path:
+        return self.path / f"{stage.name.lower()}{stage.file_suffix(encoding)}"
@@ -2,13 +2,26 @@
 
 from __future__ import annotations
 
+import functools
+import itertools
+import os
+import shutil
+import subprocess
 import sys
 import tempfile
+import threading
 from abc import ABC, abstractmethod
 from enum import Enum
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from guppy_runner.stage import EncodingMode, Stage, StageData
+from guppy_runner.util import LOGGER, CommandStr
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from guppy_runner.cache import ArtifactCache
 
 
 class StageCompiler(ABC):
@@ -16,6 +29,8 @@ class StageCompiler(ABC):
 
     INPUT_STAGE: Stage
     OUTPUT_STAGE: Stage
+    # The `RunOptions` attribute with the output file for this stage.
+    OUTPUT_KEY: str
 
     @abstractmethod
     def process_stage(  # noqa: PLR0913
@@ -44,6 +59,14 @@ class StageCompiler(ABC):
         :returns: Either the in-memory data, or a path to the output.
         """
 
+    def signature(self) -> str:
+        """Returns an identifier for the compiler configuration.
+
+        This is used as part of the key for cached artifacts, so it must change
+        whenever the compiler may produce a different output for the same input.
+        """
+        return type(self).__name__
+
     def _check_stage(self, data: StageData) -> None:
         if data.stage != self.INPUT_STAGE:
             raise InvalidStageError(data.stage, self.INPUT_STAGE)
@@ -59,19 +82,29 @@ class StageCompiler(ABC):
         return EncodingMode.from_file(out_file, self.OUTPUT_STAGE) or default
 
     def _store_artifact(self, data: StageData, path: Path) -> None:
-        mode = "w" if data.encoding == EncodingMode.TEXTUAL else "wb"
-        with path.open(mode=mode) as file:
-            file.write(data.data)
+        if data.data_path is not None:
+            # Copy the file directly, without loading it in memory.
+            # This also preserves its permissions.
+            shutil.copy(data.data_path, path)
+        elif isinstance(data.data, str):
+            path.write_text(data.data)
+        else:
+            path.write_bytes(data.data)
 
-    def run(
+    def run(  # noqa: PLR0913
         self,
         data: StageData,
         *,
         output_mode: EncodingMode | None = None,
         output_file: Path | None = None,
         module_name: str | None = None,
+        cache: ArtifactCache | None = None,
     ) -> StageData:
-        """Transform the input into the following stage."""
+        """Transform the input into the following stage.
+
+        If a cache is given and it contains the output artifact, the compilation
+        is skipped. Otherwise, the produced artifact is stored in the cache.
+        """
         self._check_stage(data)
 
         # Determine the output encoding.
@@ -81,6 +114,11 @@ class StageCompiler(ABC):
                 default=self.OUTPUT_STAGE.default_encoding(),
             )
 
+        if cache is not None:
+            cached = cache.lookup(self.OUTPUT_STAGE, output_mode)
+            if cached is not None:
+                return self._load_cached(cached, output_mode, output_file)
+
         if data.data_path is None:
             output_data = self._translate_data(
                 data.data,
@@ -106,9 +144,67 @@ class StageCompiler(ABC):
             output = StageData(self.OUTPUT_STAGE, output_data, output_mode)
             if output_file:
                 self._store_artifact(output, output_file)
+                # Keep the in-memory data, but let the next stage read the stored
+                # file instead of spilling the data to a new temporary file.
+                output.data_path = output_file
+
+        if cache is not None:
+            cache.store(output)
 
         return output
 
+    def run_many(
+        self,
+        datas: Sequence[StageData],
+        *,
+        output_files: Sequence[Path | None] | None = None,
+        module_name: str | None = None,
+    ) -> list[StageData]:
+        """Transform multiple independent inputs into the following stage.
+
+        The inputs are processed concurrently, so the external tools run in
+        parallel. Errors from any of the inputs are raised after all the inputs
+        have been processed.
+
+        :param datas: The inputs to transform.
+        :param output_files: Optional. A path to store each resulting artifact.
+            Defaults to keeping the outputs in memory when possible.
+        :param module_name: The name of the module being compiled.
+        :returns: The transformed artifacts, in the same order as the inputs.
+        """
+        if output_files is None:
+            output_files = [None] * len(datas)
+        if len(output_files) != len(datas):
+            msg = "Expected one output file per input."
+            raise ValueError(msg)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = [
+                executor.submit(
+                    self.run,
+                    data,
+                    output_file=output_file,
+                    module_name=module_name,
+                )
+                for data, output_file in zip(datas, output_files, strict=True)
+            ]
+        return [future.result() for future in futures]
+
+    def _load_cached(
+        self,
+        cached: Path,
+        output_mode: EncodingMode,
+        output_file: Path | None,
+    ) -> StageData:
+        """Load a cached artifact, copying it to the output file if required."""
+        if output_file:
+            # Copy the file directly to preserve its permissions.
+            shutil.copy(cached, output_file)
+            return StageData.from_path(self.OUTPUT_STAGE, output_file, output_mode)
+        return StageData.from_path(self.OUTPUT_STAGE, cached, output_mode)
+
     def _translate_data(  # noqa: PLR0913
         self,
         input_data: str | bytes,
@@ -120,26 +216,24 @@ class StageCompiler(ABC):
         """Translate data encoded in-memory.
 
         First writes it to a temporary file, then translates it.
+        The file is removed afterwards, even if the translation fails.
         """
-        mode = "w" if input_encoding == EncodingMode.TEXTUAL else "wb"
-        suffix = self.INPUT_STAGE.file_suffix(input_encoding)
-        with tempfile.NamedTemporaryFile(
-            mode=mode,
-            suffix=suffix,
-            delete=False,
-        ) as temp_file:
-            temp_file.write(input_data)
-            input_path = Path(temp_file.name)
-        output = self.process_stage(
-            input_path=input_path,
-            input_encoding=input_encoding,
-            output_path=output_path,
-            output_encoding=output_encoding,
-            temp_file=True,
-            module_name=module_name,
-        )
-        input_path.unlink()
-        return output
+        input_path = staging_path(self.INPUT_STAGE.file_suffix(input_encoding))
+        try:
+            if isinstance(input_data, str):
+                input_path.write_text(input_data)
+            else:
+                input_path.write_bytes(input_data)
+            return self.process_stage(
+                input_path=input_path,
+                input_encoding=input_encoding,
+                output_path=output_path,
+                output_encoding=output_encoding,
+                temp_file=True,
+                module_name=module_name,
+            )
+        finally:
+            input_path.unlink(missing_ok=True)
 
     def _translate_file(  # noqa: PLR0913
         self,
@@ -150,6 +244,7 @@ class StageCompiler(ABC):
         module_name: str | None = None,
     ) -> str | bytes | Path:
         """Translate data encoded in a file."""
+        prefetch_file(path)
         return self.process_stage(
             input_path=path,
             input_encoding=input_encoding,
@@ -160,6 +255,234 @@ class StageCompiler(ABC):
         )
 
 
+class ToolCompiler(StageCompiler):
+    """A compiler stage that runs a single external tool.
+
+    The tool reads its input from a file or stdin, and writes its output to a file
+    or stdout. In-memory inputs are piped to the tool, and consecutive tool stages
+    can run concurrently as a process pipeline. See `guppy_runner.compile.pipeline`.
+    """
+
+    @abstractmethod
+    def command(
+        self,
+        input_path: Path | str,
+        output_path: Path | None,
+        output_encoding: EncodingMode,
+    ) -> list[str | Path]:
+        """Returns the command that runs this stage.
+
+        :param input_path: The input file path, or "-" to read from stdin.
+        :param output_path: Optional. The output file path. If not given, the
+            command must write the artifact to stdout.
+        :param output_encoding: The output encoding mode.
+        :raises UnsupportedEncodingError: If the tool cannot produce the encoding.
+        """
+
+    @abstractmethod
+    def tool_error(
+        self,
+        err: FileNotFoundError | subprocess.CalledProcessError,
+    ) -> CompilerError:
+        """Returns the error to raise when the tool fails."""
+
+    def process_stage(  # noqa: PLR0913
+        self,
+        *,
+        input_path: Path,
+        input_encoding: EncodingMode,
+        output_path: Path | None,
+        output_encoding: EncodingMode,
+        temp_file: bool = False,
+        module_name: str | None = None,
+    ) -> str | bytes | Path:
+        """Run the tool on an input file."""
+        _ = input_encoding, temp_file, module_name
+        cmd = self.command(input_path, output_path, output_encoding)
+        return self._run_tool(cmd, output_path, output_encoding)
+
+    def _translate_data(  # noqa: PLR0913
+        self,
+        input_data: str | bytes,
+        input_encoding: EncodingMode,
+        output_path: Path | None,
+        output_encoding: EncodingMode,
+        module_name: str | None = None,
+    ) -> str | bytes | Path:
+        """Run the tool on in-memory data, piping it to the tool's stdin."""
+        _ = input_encoding, module_name
+        cmd = self.command("-", output_path, output_encoding)
+        if isinstance(input_data, str):
+            input_data = input_data.encode()
+        return self._run_tool(cmd, output_path, output_encoding, input_data)
+
+    def _run_tool(
+        self,
+        cmd: list[str | Path],
+        output_path: Path | None,
+        output_encoding: EncodingMode,
+        input_data: bytes | None = None,
+    ) -> str | bytes | Path:
+        """Run the tool command.
+
+        :returns: The output path if given, or the data written to stdout.
+        """
+        LOGGER.info("Executing command: %s", CommandStr(cmd))
+        try:
+            completed = subprocess.run(
+                cmd,  # noqa: S603
+                input=input_data,
+                # Don't capture the output if the tool writes it to a file.
+                stdout=subprocess.DEVNULL if output_path else subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                check=True,
+            )
+        except (FileNotFoundError, subprocess.CalledProcessError) as err:
+            raise self.tool_error(err) from err
+        if output_path:
+            return output_path
+        if output_encoding == EncodingMode.TEXTUAL:
+            return completed.stdout.decode()
+        return completed.stdout
+
+
+def find_tool(name: str, env_var: str | None = None) -> tuple[Path, bool]:
+    """Returns the path to an external tool binary.
+
+    Looks for it in your PATH by default, unless the `env_var` env variable is
+    set. The lookup result is cached, so the PATH is only searched once per tool.
+
+    The returned boolean indicates whether the path was overridden via the
+    environment variable.
+    """
+    if env_var is not None and env_var in os.environ:
+        return (_resolve_tool(os.environ[env_var]), True)
+    return (_resolve_tool(name), False)
+
+
+@functools.cache
+def _resolve_tool(tool: str) -> Path:
+    """Returns the absolute path to a tool, or the tool itself if it is not found."""
+    resolved = shutil.which(tool)
+    return Path(resolved) if resolved is not None else Path(tool)
+
+
+@functools.cache
+def memory_temp_dir() -> str | None:
+    """Returns a memory-backed directory for temporary files, if available.
+
+    In-memory artifacts are spilled to files there when a tool can only read
+    from a path, avoiding a round trip through the disk. Returns None to use the
+    default temporary directory.
+    """
+    shm = Path("/dev/shm")  # noqa: S108
+    if shm.is_dir() and os.access(shm, os.W_OK | os.X_OK):
+        return str(shm)
+    return None
+
+
+def staging_path(suffix: str) -> Path:
+    """Returns a new path for a temporary file.
+
+    The files are placed in a staging directory shared by the whole process, which
+    is created on first use and removed by `remove_staging_dir` or when the
+    interpreter exits. Callers should still remove their files once they are done
+    with them.
+    """
+    return _staging_dir() / f"artifact{next(_STAGING_COUNTER)}{suffix}"
+
+
+def remove_staging_dir() -> None:
+    """Remove the staging directory, along with any files left in it.
+
+    Must be called before replacing the process with `exec`, since the directory is
+    otherwise only removed when the interpreter exits.
+    """
+    with _STAGING_LOCK:
+        while _STAGING_DIRS:
+            _STAGING_DIRS.pop().cleanup()
+
+
+# Counter for unique file names in the staging directory.
+_STAGING_COUNTER = itertools.count()
+
+# The current staging directory, if it has been created.
+# Guarded by `_STAGING_LOCK`, since stages may be compiled concurrently.
+_STAGING_DIRS: list[tempfile.TemporaryDirectory] = []
+_STAGING_LOCK = threading.Lock()
+
+
+def _staging_dir() -> Path:
+    """Returns the process-wide staging directory for temporary files."""
+    with _STAGING_LOCK:
+        if not _STAGING_DIRS:
+            _STAGING_DIRS.append(
+                tempfile.TemporaryDirectory(
+                    prefix="guppy_runner-",
+                    dir=memory_temp_dir(),
+                ),
+            )
+        return Path(_STAGING_DIRS[0].name)
+
+
+def prefetch_file(path: Path) -> None:
+    """Ask the kernel to start reading a file into the page cache.
+
+    The external tools read their input once, sequentially. Starting the readahead
+    before spawning them overlaps the disk reads with the tool startup.
+    Does nothing on platforms without `posix_fadvise`.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def tool_signature(tool: Path) -> str:
+    """Returns an identifier for an external tool binary.
+
+    Includes the resolved path of the binary and its modification time and size,
+    so cached artifacts are invalidated when the tool is updated.
+    """
+    resolved = shutil.which(tool)
+    if resolved is None:
+        return str(tool)
+    return file_signature(Path(resolved))
+
+
+def file_signature(path: Path) -> str:
+    """Returns an identifier for a file used by an external tool.
+
+    Includes the path and the modification time and size of the file, or just the
+    path if it does not exist.
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return str(path)
+    return f"{path}@{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def stderr_first_line(stderr: str | bytes | None) -> str:
+    """Returns the first line of a tool's error output.
+
+    Only the first line is decoded, so a large error output is not split.
+    """
+    if not stderr:
+        return ""
+    if isinstance(stderr, bytes):
+        return stderr.partition(b"\n")[0].decode(errors="replace").rstrip("\r")
+    return stderr.partition("\n")[0].rstrip("\r")
+
+
 class CompilerError(Exception):
     """Base class for processor errors."""
 
@@ -1,21 +1,43 @@
 """Methods for compiling Guppy programs into HUGRs."""
 
-import importlib.machinery
-import types
-from pathlib import Path
+from __future__ import annotations
 
-from guppylang.decorator import guppy  # type: ignore
-from guppylang.module import GuppyModule  # type: ignore
+import hashlib
+import linecache
+import threading
+import types
+from collections import OrderedDict
+from importlib.machinery import SourceFileLoader
+from typing import TYPE_CHECKING
 
 from guppy_runner.compile import CompilerError, StageCompiler
 from guppy_runner.stage import EncodingMode, Stage
 
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from guppylang.hugr.hugr import Hugr  # type: ignore
+    from guppylang.module import GuppyModule  # type: ignore
+
+# Loading a Guppy program executes arbitrary Python code and registers its
+# modules in the global `guppy` decorator, so only one program is loaded at a time.
+_LOAD_LOCK = threading.Lock()
+
+# Sentinel for missing module attributes.
+_MISSING = object()
+
+# Compiled code of the loaded Guppy files, keyed by path, mtime and size.
+# Repeated loads of an unchanged file skip reading and parsing the source.
+_CODE_CACHE: OrderedDict[tuple[str, int, int], types.CodeType] = OrderedDict()
+_CODE_CACHE_SIZE = 128
+
 
 class GuppyCompiler(StageCompiler):
     """A processor for compiling Guppy programs into Hugrs."""
 
     INPUT_STAGE: Stage = Stage.GUPPY
     OUTPUT_STAGE: Stage = Stage.HUGR
+    OUTPUT_KEY: str = "hugr_out"
 
     def process_stage(  # noqa: PLR0913
         self,
@@ -32,24 +54,50 @@ class GuppyCompiler(StageCompiler):
         if input_encoding != EncodingMode.TEXTUAL:
             raise BitcodeProgramError
 
-        loader = importlib.machinery.SourceFileLoader("module", str(input_path))
-        py_module = types.ModuleType(loader.name)
-        try:
-            loader.exec_module(py_module)
-        except FileNotFoundError as err:
-            raise InvalidGuppyModulePathError(input_path) from err
+        with _LOAD_LOCK:
+            module = self._load_guppy_file(
+                input_path,
+                module_name=module_name,
+                temp_file=temp_file,
+            )
+            hugr = module.compile()
 
-        module = self._get_module(
-            py_module,
-            input_path if not temp_file else None,
-            module_name=module_name,
-        )
-        hugr = module.compile()
+        return _serialize_hugr(hugr, output_encoding)
+
+    def _translate_data(  # noqa: PLR0913
+        self,
+        input_data: str | bytes,
+        input_encoding: EncodingMode,
+        output_path: Path | None,
+        output_encoding: EncodingMode,
+        module_name: str | None = None,
+    ) -> str | bytes:
+        """Compile an in-memory Guppy program.
+
+        The program is executed directly from memory, instead of being written to
+        a temporary file. Its source is registered in `linecache` while it is
+        compiled, so Guppy can still retrieve the function definitions.
+        """
+        _ = output_path
+        if input_encoding != EncodingMode.TEXTUAL or not isinstance(input_data, str):
+            raise BitcodeProgramError
+
+        digest = hashlib.blake2b(input_data.encode(), digest_size=8).hexdigest()
+        filename = f"<guppy-{digest}>"
+        lines = input_data.splitlines(keepends=True)
 
-        # Serialize the Hugr artifact.
-        if output_encoding == EncodingMode.TEXTUAL:
-            return hugr.serialize_json()
-        return hugr.serialize()
+        with _LOAD_LOCK:
+            linecache.cache[filename] = (len(input_data), None, lines, filename)
+            try:
+                py_module = types.ModuleType("module")
+                code = compile(input_data, filename, "exec")
+                exec(code, py_module.__dict__)  # noqa: S102
+                module = self._get_module(py_module, None, module_name=module_name)
+                hugr = module.compile()
+            finally:
+                linecache.cache.pop(filename, None)
+
+        return _serialize_hugr(hugr, output_encoding)
 
     def _load_guppy_file(
         self,
@@ -59,12 +107,13 @@ class GuppyCompiler(StageCompiler):
         temp_file: bool = False,
     ) -> GuppyModule:
         """Load a Guppy file as a Python module, and return it."""
-        loader = importlib.machinery.SourceFileLoader("module", str(program_path))
-        py_module = types.ModuleType(loader.name)
         try:
-            loader.exec_module(py_module)
+            code = _compile_file(program_path, cache=not temp_file)
         except FileNotFoundError as err:
             raise InvalidGuppyModulePathError(program_path) from err
+        py_module = types.ModuleType("module")
+        py_module.__file__ = str(program_path)
+        exec(code, py_module.__dict__)  # noqa: S102
         return self._get_module(
             py_module,
             program_path if not temp_file else None,
@@ -77,10 +126,15 @@ class GuppyCompiler(StageCompiler):
         source_path: Path | None,
         module_name: str | None = None,
     ) -> GuppyModule:
+        # Guppy is imported lazily, so runs starting from a later stage
+        # don't need to load the Guppy compiler.
+        from guppylang.decorator import guppy  # type: ignore
+        from guppylang.module import GuppyModule  # type: ignore
+
         if module_name is not None:
-            if module_name not in py_module.__dir__():
+            module = getattr(py_module, module_name, _MISSING)
+            if module is _MISSING:
                 raise MissingModuleError(module_name, source_path)
-            module = getattr(py_module, module_name)
         else:
             for module_id in guppy.registered_modules():
                 if module_id.module == py_module or module_id.filename == source_path:
@@ -98,6 +152,44 @@ class GuppyCompiler(StageCompiler):
         return module
 
 
+def _compile_file(program_path: Path, *, cache: bool = True) -> types.CodeType:
+    """Compile a Python source file, reusing the code of previous loads.
+
+    Cached files are loaded through the import machinery, so the bytecode in
+    `__pycache__` is reused across runs.
+
+    Must be called while holding `_LOAD_LOCK`.
+
+    :param program_path: The source file.
+    :param cache: Whether to cache the compiled code. Temporary files are never
+        loaded twice, so they are not cached.
+    """
+    stat = program_path.stat()
+    key = (str(program_path), stat.st_mtime_ns, stat.st_size)
+    code = _CODE_CACHE.get(key)
+    if code is not None:
+        _CODE_CACHE.move_to_end(key)
+        return code
+
+    if not cache:
+        return compile(program_path.read_bytes(), str(program_path), "exec")
+
+    code = SourceFileLoader("module", str(program_path)).get_code("module")
+    if code is None:
+        raise InvalidGuppyModulePathError(program_path)
+    _CODE_CACHE[key] = code
+    if len(_CODE_CACHE) > _CODE_CACHE_SIZE:
+        _CODE_CACHE.popitem(last=False)
+    return code
+
+
+def _serialize_hugr(hugr: Hugr, encoding: EncodingMode) -> str | bytes:
+    """Serialize a compiled Hugr artifact."""
+    if encoding == EncodingMode.TEXTUAL:
+        return hugr.serialize_json()
+    return hugr.serialize()
+
+
 class GuppyCompilerError(CompilerError):
     """Base class for Guppy compiler errors."""
 
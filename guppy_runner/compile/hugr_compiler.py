@@ -1,24 +1,42 @@
 """Methods for compiling HUGR-encoded guppy programs into MLIR objects."""
 
 
-import os
+import re
 import subprocess
 from pathlib import Path
 from subprocess import CalledProcessError
 
-from guppy_runner.compile import CompilerError, StageCompiler, UnsupportedEncodingError
+from guppy_runner.compile import (
+    CompilerError,
+    StageCompiler,
+    UnsupportedEncodingError,
+    find_tool,
+    stderr_first_line,
+    tool_signature,
+)
 from guppy_runner.stage import EncodingMode, Stage
-from guppy_runner.util import LOGGER
+from guppy_runner.util import LOGGER, CommandStr
 
 HUGR_MLIR_TRANSLATE = "hugr-mlir-translate"
 HUGR_MLIR_TRANSLATE_ENV = "HUGR_MLIR_TRANSLATE"
 
+# The declaration of the `main` function, but not of e.g. `main_helper`.
+_MAIN_FUNC = re.compile(r"func @main(?=\()")
+
+# Errors reported by tools that try to open "-" as a file instead of reading stdin.
+_STDIN_UNSUPPORTED = re.compile(r"'-'|\"-\"|No such file or directory")
+
 
 class HugrCompiler(StageCompiler):
     """A processor for compiling Hugr objects into MLIR."""
 
     INPUT_STAGE: Stage = Stage.HUGR
     OUTPUT_STAGE: Stage = Stage.HUGR_MLIR
+    OUTPUT_KEY: str = "hugr_mlir_out"
+
+    # Whether `hugr-mlir-translate` can read its input from stdin.
+    # Cleared the first time the tool fails to open "-" as its input.
+    _stdin_supported: bool = True
 
     def process_stage(  # noqa: PLR0913
         self,
@@ -32,38 +50,90 @@ class HugrCompiler(StageCompiler):
     ) -> str | bytes:
         """Execute `hugr-mlir-translate`."""
         _ = output_path, temp_file, module_name
+        return self._exec_translate(input_path, input_encoding, output_encoding)
 
+    def _translate_data(  # noqa: PLR0913
+        self,
+        input_data: str | bytes,
+        input_encoding: EncodingMode,
+        output_path: Path | None,
+        output_encoding: EncodingMode,
+        module_name: str | None = None,
+    ) -> str | bytes | Path:
+        """Translate an in-memory Hugr, passing it to the tool via stdin.
+
+        Falls back to a temporary file if the tool cannot open "-" as its input.
+        Any other error is raised directly.
+        """
+        if self._stdin_supported:
+            try:
+                return self._exec_translate(
+                    "-",
+                    input_encoding,
+                    output_encoding,
+                    input_data=input_data,
+                )
+            except StdinUnsupportedError:
+                LOGGER.info(
+                    "'%s' cannot read from stdin, using files.",
+                    HUGR_MLIR_TRANSLATE,
+                )
+                self._stdin_supported = False
+        return super()._translate_data(
+            input_data,
+            input_encoding,
+            output_path,
+            output_encoding,
+            module_name=module_name,
+        )
+
+    def _exec_translate(
+        self,
+        input_path: Path | str,
+        input_encoding: EncodingMode,
+        output_encoding: EncodingMode,
+        input_data: str | bytes | None = None,
+    ) -> str:
+        """Execute `hugr-mlir-translate`.
+
+        :param input_path: The input file path, or "-" to read `input_data` from
+            stdin.
+        """
         if output_encoding == EncodingMode.BITCODE:
             raise UnsupportedEncodingError(self.OUTPUT_STAGE, output_encoding)
 
-        output_as_text = output_encoding == EncodingMode.TEXTUAL
         input_mode_flag = (
             "--hugr-json-to-mlir"
             if input_encoding == EncodingMode.TEXTUAL
             else "--hugr-rmp-to-mlir"
         )
         cmd = [self._get_compiler()[0], input_mode_flag, input_path]
+        if isinstance(input_data, str):
+            input_data = input_data.encode()
 
-        cmd_str = " ".join(str(c) for c in cmd)
-        msg = f"Executing command: '{cmd_str}'"
-        LOGGER.info(msg)
+        LOGGER.info("Executing command: %s", CommandStr(cmd))
         try:
             completed = subprocess.run(
                 cmd,  # noqa: S603
+                input=input_data,
                 capture_output=True,
                 check=True,
-                text=output_as_text,
             )
         except FileNotFoundError as err:
             raise HugrMlirTranslateNotFoundError(*self._get_compiler()) from err
         except CalledProcessError as err:
+            stderr = err.stderr.decode(errors="replace") if err.stderr else ""
+            if input_path == "-" and _STDIN_UNSUPPORTED.search(stderr):
+                raise StdinUnsupportedError(err) from err
             raise MlirTranslateError(err) from err
 
         # TODO: Temporary fix. `hugr-mlir-translate` is not marking main as public.
-        return str(completed.stdout).replace(
-            "func @main",
-            "func public @main",
-        )
+        # The output is always textual, and defines a single main function.
+        return _MAIN_FUNC.sub("func public @main", completed.stdout.decode(), count=1)
+
+    def signature(self) -> str:
+        """Returns an identifier for the compiler configuration."""
+        return f"{super().signature()}:{tool_signature(self._get_compiler()[0])}"
 
     def _get_compiler(self) -> tuple[Path, bool]:
         """Returns the path to the `hugr-mlir-translate` binary.
@@ -74,9 +144,7 @@ class HugrCompiler(StageCompiler):
         The returned boolean indicates whether the path was overridden via the
         environment variable.
         """
-        if HUGR_MLIR_TRANSLATE_ENV in os.environ:
-            return (Path(os.environ[HUGR_MLIR_TRANSLATE_ENV]), True)
-        return (Path(HUGR_MLIR_TRANSLATE), False)
+        return find_tool(HUGR_MLIR_TRANSLATE, HUGR_MLIR_TRANSLATE_ENV)
 
 
 class HugrCompilerError(CompilerError):
@@ -106,7 +174,11 @@ class MlirTranslateError(HugrCompilerError):
 
     def __init__(self, perror: CalledProcessError) -> None:
         """Initialize the error."""
-        err_line = next(iter(perror.stderr.splitlines()), "")
+        err_line = stderr_first_line(perror.stderr)
         super().__init__(
             f"An error occurred while calling 'hugr-mlir-translate':\n{err_line}",
         )
+
+
+class StdinUnsupportedError(MlirTranslateError):
+    """Raised when the translation program cannot read its input from stdin."""
@@ -3,6 +3,7 @@
 
 import os
 import subprocess
+from collections.abc import Sequence
 from pathlib import Path
 from subprocess import CalledProcessError
 
@@ -10,9 +11,13 @@ from guppy_runner.compile import (
     CompilerError,
     StageCompiler,
     UnsupportedEncodingError,
+    file_signature,
+    find_tool,
+    stderr_first_line,
+    tool_signature,
 )
-from guppy_runner.stage import EncodingMode, Stage
-from guppy_runner.util import LOGGER
+from guppy_runner.stage import EncodingMode, Stage, StageData
+from guppy_runner.util import LOGGER, CommandStr
 
 CLANG = "clang"
 QIR_BACKEND_LIBS_ENV = "QIR_BACKEND_LIBS"
@@ -26,6 +31,7 @@ class Linker(StageCompiler):
 
     INPUT_STAGE: Stage = Stage.OBJECT
     OUTPUT_STAGE: Stage = Stage.EXECUTABLE
+    OUTPUT_KEY: str = "bin_out"
 
     def process_stage(  # noqa: PLR0913
         self,
@@ -57,13 +63,13 @@ class Linker(StageCompiler):
             "-lm",
         ]
 
-        cmd_str = " ".join(str(c) for c in cmd)
-        msg = f"Executing command: '{cmd_str}'"
-        LOGGER.info(msg)
+        LOGGER.info("Executing command: %s", CommandStr(cmd))
         try:
             subprocess.run(
                 cmd,  # noqa: S603
-                capture_output=True,
+                # Only the error output is needed, the binary is written to a file.
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 check=True,
                 text=False,
             )
@@ -74,13 +80,45 @@ class Linker(StageCompiler):
 
         return output_path
 
+    def run_many(
+        self,
+        datas: Sequence[StageData],
+        *,
+        output_files: Sequence[Path | None] | None = None,
+        module_name: str | None = None,
+    ) -> list[StageData]:
+        """Link multiple independent object files into binaries.
+
+        Every input must have its own output file, since the binaries would
+        otherwise all be written to the default path.
+        """
+        if output_files is None or any(path is None for path in output_files):
+            msg = "Each linked binary must have its own output file."
+            raise ValueError(msg)
+        return super().run_many(
+            datas,
+            output_files=output_files,
+            module_name=module_name,
+        )
+
+    def signature(self) -> str:
+        """Returns an identifier for the compiler configuration."""
+        clang = tool_signature(self._get_compiler()[0])
+        qir_libs = os.environ.get(QIR_BACKEND_LIBS_ENV, "")
+        # Rebuilding the backend library in place must invalidate the binaries
+        # linked against it.
+        libs = sorted(Path(qir_libs).glob("libqir_backend.*")) if qir_libs else []
+        return ":".join(
+            [super().signature(), clang, qir_libs, *map(file_signature, libs)],
+        )
+
     def _get_compiler(self) -> tuple[Path, bool]:
         """Returns the path to the `clang` binary.
 
         The returned boolean indicates whether the path was overridden via the
         environment variable.
         """
-        return (Path(CLANG), False)
+        return find_tool(CLANG)
 
     def _get_qir_lib_path(self) -> Path:
         """Returns the path to the QIR library.
@@ -89,10 +127,10 @@ class Linker(StageCompiler):
 
         This path **must** be set via the QIR_BACKEND_LIBS environment variable.
         """
-        try:
-            return Path(os.environ[QIR_BACKEND_LIBS_ENV])
-        except KeyError:
-            raise QirLibsNotSetError from None
+        qir_libs = os.environ.get(QIR_BACKEND_LIBS_ENV)
+        if qir_libs is None:
+            raise QirLibsNotSetError
+        return Path(qir_libs)
 
 
 class LinkerError(CompilerError):
@@ -123,7 +161,7 @@ class ClangError(LinkerError):
 
     def __init__(self, perror: CalledProcessError) -> None:
         """Initialize the error."""
-        err_line = next(iter(perror.stderr.splitlines()), "")
+        err_line = stderr_first_line(perror.stderr)
         super().__init__(
             f"An error occurred while calling '{CLANG}':\n{err_line}",
         )
@@ -1,72 +1,60 @@
 """Utilities to link and run the final LLVM artifact."""
 
 
-import os
-import subprocess
 from pathlib import Path
 from subprocess import CalledProcessError
 
 from guppy_runner.compile import (
     CompilerError,
-    StageCompiler,
+    ToolCompiler,
     UnsupportedEncodingError,
+    find_tool,
+    stderr_first_line,
+    tool_signature,
 )
 from guppy_runner.stage import EncodingMode, Stage
-from guppy_runner.util import LOGGER
 
 LLC = "llc"
 LLC_ENV = "LLC"
 
-# TODO: Find the way to use a temporary file that gets deleted afterwards.
-DEFAULT_OBJ = Path("a.o")
 
-
-class LlvmCompiler(StageCompiler):
+class LlvmCompiler(ToolCompiler):
     """A processor for running an LLVMIR artifact."""
 
     INPUT_STAGE: Stage = Stage.LLVM
     OUTPUT_STAGE: Stage = Stage.OBJECT
+    OUTPUT_KEY: str = "obj_out"
 
-    def process_stage(  # noqa: PLR0913
+    def command(
         self,
-        *,
-        input_path: Path,
-        input_encoding: EncodingMode,
+        input_path: Path | str,
         output_path: Path | None,
         output_encoding: EncodingMode,
-        temp_file: bool = False,
-        module_name: str | None = None,
-    ) -> str | bytes | Path:
-        """Compile the LLVMIR artifact into an object file."""
-        _ = input_path, input_encoding, output_encoding, temp_file, module_name
-
+    ) -> list[str | Path]:
+        """Returns the `llc` command compiling LLVMIR into an object file."""
         if output_encoding == EncodingMode.TEXTUAL:
             raise UnsupportedEncodingError(self.OUTPUT_STAGE, output_encoding)
+        # Without an output path, the object is written to stdout.
+        return [
+            self._get_compiler()[0],
+            input_path,
+            "--filetype=obj",
+            "-o",
+            output_path or "-",
+        ]
+
+    def tool_error(
+        self,
+        err: FileNotFoundError | CalledProcessError,
+    ) -> CompilerError:
+        """Returns the error to raise when `llc` fails."""
+        if isinstance(err, FileNotFoundError):
+            return LlcNotFoundError()
+        return LlcError(err)
 
-        if not output_path:
-            output_path = DEFAULT_OBJ
-
-        output_as_text = output_encoding == EncodingMode.TEXTUAL
-        cmd = [self._get_compiler()[0], input_path, "--filetype=obj"]
-        if output_path:
-            cmd += ["-o", output_path]
-
-        cmd_str = " ".join(str(c) for c in cmd)
-        msg = f"Executing command: '{cmd_str}'"
-        LOGGER.info(msg)
-        try:
-            subprocess.run(
-                cmd,  # noqa: S603
-                capture_output=True,
-                check=True,
-                text=output_as_text,
-            )
-        except FileNotFoundError as err:
-            raise LlcNotFoundError from err
-        except CalledProcessError as err:
-            raise LlcError(err) from err
-
-        return output_path
+    def signature(self) -> str:
+        """Returns an identifier for the compiler configuration."""
+        return f"{super().signature()}:{tool_signature(self._get_compiler()[0])}"
 
     def _get_compiler(self) -> tuple[Path, bool]:
         """Returns the path to the `llc` binary.
@@ -74,9 +62,7 @@ class LlvmCompiler(StageCompiler):
         The returned boolean indicates whether the path was overridden via the
         environment variable.
         """
-        if LLC_ENV in os.environ:
-            return (Path(os.environ[LLC_ENV]), True)
-        return (Path(LLC), False)
+        return find_tool(LLC, LLC_ENV)
 
 
 class LlvmError(CompilerError):
@@ -96,7 +82,7 @@ class LlcError(LlvmError):
 
     def __init__(self, perror: CalledProcessError) -> None:
         """Initialize the error."""
-        err_line = next(iter(perror.stderr.splitlines()), "")
+        err_line = stderr_first_line(perror.stderr)
         super().__init__(
             f"An error occurred while calling '{LLC}':\n{err_line}",
         )
@@ -1,59 +1,60 @@
 """Methods for producing runnable artifacts from MLIR objects."""
 
 
-import os
-import subprocess
 from pathlib import Path
 from subprocess import CalledProcessError
 
-from guppy_runner.compile import CompilerError, StageCompiler, UnsupportedEncodingError
+from guppy_runner.compile import (
+    CompilerError,
+    ToolCompiler,
+    UnsupportedEncodingError,
+    find_tool,
+    stderr_first_line,
+    tool_signature,
+)
 from guppy_runner.stage import EncodingMode, Stage
-from guppy_runner.util import LOGGER
 
 MLIR_TRANSLATE = "mlir-translate"
 MLIR_TRANSLATE_ENV = "MLIR_TRANSLATE"
 
 
-class MLIRCompiler(StageCompiler):
+class MLIRCompiler(ToolCompiler):
     """A processor for compiling lowered MLIR objects into LLVMIR."""
 
     INPUT_STAGE: Stage = Stage.LOWERED_MLIR
     OUTPUT_STAGE: Stage = Stage.LLVM
+    OUTPUT_KEY: str = "llvm_out"
 
-    def process_stage(  # noqa: PLR0913
+    def command(
         self,
-        *,
-        input_path: Path,
-        input_encoding: EncodingMode,
+        input_path: Path | str,
         output_path: Path | None,
         output_encoding: EncodingMode,
-        temp_file: bool = False,
-        module_name: str | None = None,
-    ) -> str | bytes:
-        """Execute `mlir-translate`."""
-        _ = input_encoding, output_path, temp_file, module_name
-
+    ) -> list[str | Path]:
+        """Returns the `mlir-translate` command producing LLVMIR."""
         if output_encoding == EncodingMode.BITCODE:
             raise UnsupportedEncodingError(self.OUTPUT_STAGE, output_encoding)
+        cmd: list[str | Path] = [
+            self._get_compiler()[0],
+            input_path,
+            "--mlir-to-llvmir",
+        ]
+        if output_path:
+            cmd += ["-o", output_path]
+        return cmd
+
+    def tool_error(
+        self,
+        err: FileNotFoundError | CalledProcessError,
+    ) -> CompilerError:
+        """Returns the error to raise when `mlir-translate` fails."""
+        if isinstance(err, FileNotFoundError):
+            return MlirTranslateNotFoundError()
+        return MlirTranslateError(err)
 
-        output_as_text = output_encoding == EncodingMode.TEXTUAL
-        cmd = [self._get_compiler()[0], input_path, "--mlir-to-llvmir"]
-
-        cmd_str = " ".join(str(c) for c in cmd)
-        msg = f"Executing command: '{cmd_str}'"
-        LOGGER.info(msg)
-        try:
-            completed = subprocess.run(
-                cmd,  # noqa: S603
-                capture_output=True,
-                check=True,
-                text=output_as_text,
-            )
-        except FileNotFoundError as err:
-            raise MlirTranslateNotFoundError from err
-        except CalledProcessError as err:
-            raise MlirTranslateError(err) from err
-        return completed.stdout
+    def signature(self) -> str:
+        """Returns an identifier for the compiler configuration."""
+        return f"{super().signature()}:{tool_signature(self._get_compiler()[0])}"
 
     def _get_compiler(self) -> tuple[Path, bool]:
         """Returns the path to the `mlir-translate` binary.
@@ -61,9 +62,7 @@ class MLIRCompiler(StageCompiler):
         The returned boolean indicates whether the path was overridden via the
         environment variable.
         """
-        if MLIR_TRANSLATE_ENV in os.environ:
-            return (Path(os.environ[MLIR_TRANSLATE_ENV]), True)
-        return (Path(MLIR_TRANSLATE), False)
+        return find_tool(MLIR_TRANSLATE, MLIR_TRANSLATE_ENV)
 
 
 class MlirCompilerError(CompilerError):
@@ -83,7 +82,7 @@ class MlirTranslateError(MlirCompilerError):
 
     def __init__(self, perror: CalledProcessError) -> None:
         """Initialize the error."""
-        err_line = next(iter(perror.stderr.splitlines()), "")
+        err_line = stderr_first_line(perror.stderr)
         super().__init__(
             f"An error occurred while calling '{MLIR_TRANSLATE}':\n{err_line}",
         )
@@ -1,58 +1,138 @@
 """Methods for producing runnable artifacts from MLIR objects."""
 
+from __future__ import annotations
 
-import os
+import re
 import subprocess
-from pathlib import Path
 from subprocess import CalledProcessError
-
-from guppy_runner.compile import CompilerError, StageCompiler
-from guppy_runner.stage import EncodingMode, Stage
-from guppy_runner.util import LOGGER
+from typing import TYPE_CHECKING
+
+from guppy_runner.compile import (
+    CompilerError,
+    ToolCompiler,
+    find_tool,
+    stderr_first_line,
+    tool_signature,
+)
+from guppy_runner.stage import EncodingMode, Stage, StageData
+from guppy_runner.util import LOGGER, CommandStr
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from pathlib import Path
 
 HUGR_MLIR_OPT = "hugr-mlir-opt"
 HUGR_MLIR_OPT_ENV = "HUGR_MLIR_OPT"
 
+# Separator between the modules processed with `--split-input-file`.
+SPLIT_MARKER = "// -----"
+_SPLIT_MARKER_RE = re.compile(rf"^{SPLIT_MARKER}\n", re.MULTILINE)
+
 
-class MLIRLowerer(StageCompiler):
+class MLIRLowerer(ToolCompiler):
     """A processor for lowering hugr MLIR into the LLVM dialect."""
 
     INPUT_STAGE: Stage = Stage.HUGR_MLIR
     OUTPUT_STAGE: Stage = Stage.LOWERED_MLIR
+    OUTPUT_KEY: str = "lowered_mlir_out"
 
-    def process_stage(  # noqa: PLR0913
+    def command(
         self,
-        *,
-        input_path: Path,
-        input_encoding: EncodingMode,
+        input_path: Path | str,
         output_path: Path | None,
         output_encoding: EncodingMode,
-        temp_file: bool = False,
+    ) -> list[str | Path]:
+        """Returns the `hugr-mlir-opt` command lowering the hugr dialect."""
+        cmd: list[str | Path] = [self._get_compiler()[0], input_path, "--lower-hugr"]
+        if output_encoding == EncodingMode.BITCODE:
+            cmd += ["--emit-bytecode"]
+        if output_path:
+            # Let the tool write the artifact directly, instead of buffering it.
+            cmd += ["-o", output_path]
+        return cmd
+
+    def run_many(
+        self,
+        datas: Sequence[StageData],
+        *,
+        output_files: Sequence[Path | None] | None = None,
         module_name: str | None = None,
-    ) -> str | bytes:
-        """Execute `hugr-mlir-opt`."""
-        _ = input_encoding, output_path, temp_file, module_name
+    ) -> list[StageData]:
+        """Lower multiple independent inputs with a single `hugr-mlir-opt` call.
 
-        output_as_text = output_encoding == EncodingMode.TEXTUAL
-        cmd = [self._get_compiler()[0], input_path, "--lower-hugr"]
-        if not output_as_text:
-            cmd += ["--emit-bytecode"]
+        Textual inputs are concatenated and lowered with `--split-input-file`,
+        so the tool only starts once. If that is not possible, or the batched
+        call fails, each input is lowered separately instead.
 
-        cmd_str = " ".join(str(c) for c in cmd)
-        msg = f"Executing command: '{cmd_str}'"
-        LOGGER.info(msg)
+        See `StageCompiler.run_many` for the parameters.
+        """
+        if output_files is None:
+            output_files = [None] * len(datas)
+
+        outputs = None
+        batchable = len(datas) > 1 and all(
+            data.stage == self.INPUT_STAGE
+            and data.encoding == EncodingMode.TEXTUAL
+            and self._get_output_mode(file, EncodingMode.TEXTUAL)
+            == EncodingMode.TEXTUAL
+            for data, file in zip(datas, output_files, strict=True)
+        )
+        if batchable:
+            outputs = self._lower_split([str(data.data) for data in datas])
+        if outputs is None:
+            return super().run_many(
+                datas,
+                output_files=output_files,
+                module_name=module_name,
+            )
+
+        results = []
+        for output, output_file in zip(outputs, output_files, strict=True):
+            result = StageData(self.OUTPUT_STAGE, output, EncodingMode.TEXTUAL)
+            if output_file:
+                self._store_artifact(result, output_file)
+                result.data_path = output_file
+            results.append(result)
+        return results
+
+    def _lower_split(self, inputs: list[str]) -> list[str] | None:
+        """Lower multiple textual modules with a single `--split-input-file` call.
+
+        Returns None if the call fails, or its output cannot be split back into
+        one module per input.
+        """
+        cmd = [
+            *self.command("-", None, EncodingMode.TEXTUAL),
+            "--split-input-file",
+        ]
+        LOGGER.info("Executing command: %s", CommandStr(cmd))
         try:
             completed = subprocess.run(
                 cmd,  # noqa: S603
+                input=f"\n{SPLIT_MARKER}\n".join(inputs),
                 capture_output=True,
                 check=True,
-                text=output_as_text,
+                text=True,
             )
-        except FileNotFoundError as err:
-            raise MlirLowererTranslateNotFoundError(*self._get_compiler()) from err
-        except CalledProcessError as err:
-            raise MlirOptError(err) from err
-        return completed.stdout
+        except (FileNotFoundError, CalledProcessError):
+            return None
+        outputs = _SPLIT_MARKER_RE.split(completed.stdout)
+        if len(outputs) != len(inputs):
+            return None
+        return outputs
+
+    def tool_error(
+        self,
+        err: FileNotFoundError | CalledProcessError,
+    ) -> CompilerError:
+        """Returns the error to raise when `hugr-mlir-opt` fails."""
+        if isinstance(err, FileNotFoundError):
+            return MlirLowererTranslateNotFoundError(*self._get_compiler())
+        return MlirOptError(err)
+
+    def signature(self) -> str:
+        """Returns an identifier for the compiler configuration."""
+        return f"{super().signature()}:{tool_signature(self._get_compiler()[0])}"
 
     def _get_compiler(self) -> tuple[Path, bool]:
         """Returns the path to the `hugr-mlir-opt` binary.
@@ -63,9 +143,7 @@ class MLIRLowerer(StageCompiler):
         The returned boolean indicates whether the path was overridden via the
         environment variable.
         """
-        if HUGR_MLIR_OPT_ENV in os.environ:
-            return (Path(os.environ[HUGR_MLIR_OPT_ENV]), True)
-        return (Path(HUGR_MLIR_OPT), False)
+        return find_tool(HUGR_MLIR_OPT, HUGR_MLIR_OPT_ENV)
 
 
 class MlirLowererError(CompilerError):
@@ -95,7 +173,7 @@ class MlirOptError(MlirLowererError):
 
     def __init__(self, perror: CalledProcessError) -> None:
         """Initialize the error."""
-        err_line = next(iter(perror.stderr.splitlines()), "")
+        err_line = stderr_first_line(perror.stderr)
         super().__init__(
             f"An error occurred while calling 'hugr-mlir-opt':\n{err_line}",
         )
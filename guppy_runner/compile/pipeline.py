@@ -0,0 +1,223 @@
+"""Run chains of compilation stages concurrently, connected via process pipes.
+
+Each stage in a chain starts as soon as its predecessor produces output, instead
+of waiting for the full intermediary artifact to be written to disk.
+"""
+
+from __future__ import annotations
+
+import shutil
+import signal
+import subprocess
+import tempfile
+from pathlib import Path
+from subprocess import CalledProcessError
+from typing import IO, TYPE_CHECKING
+
+from guppy_runner.compile import (
+    InvalidStageError,
+    StageCompiler,
+    ToolCompiler,
+    prefetch_file,
+    staging_path,
+)
+from guppy_runner.stage import EncodingMode, StageData
+from guppy_runner.util import LOGGER, CommandStr
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from guppy_runner.cache import ArtifactCache
+
+# A running stage process, with its command and stderr capture file.
+_PipedProcess = tuple[ToolCompiler, list[str | Path], subprocess.Popen, IO[bytes]]
+
+
+def pipeline_segments(
+    compilers: Sequence[tuple[StageCompiler, Path | None]],
+) -> list[list[tuple[StageCompiler, Path | None]]]:
+    """Group consecutive compilers that can be run as a single process pipeline.
+
+    A segment may only store an output artifact on its last stage, and that
+    artifact must use the stage's default encoding.
+
+    :param compilers: The compilers to run, paired with their requested output file.
+    :returns: The compilers grouped in segments, in order.
+    """
+    segments: list[list[tuple[StageCompiler, Path | None]]] = []
+    current: list[tuple[StageCompiler, Path | None]] = []
+    for compiler, output_file in compilers:
+        pipeable = isinstance(compiler, ToolCompiler)
+        if not pipeable or not _default_encoded(compiler, output_file):
+            if current:
+                segments.append(current)
+                current = []
+            segments.append([(compiler, output_file)])
+            continue
+        current.append((compiler, output_file))
+        if output_file is not None:
+            segments.append(current)
+            current = []
+    if current:
+        segments.append(current)
+    return segments
+
+
+def run_piped(
+    compilers: Sequence[ToolCompiler],
+    data: StageData,
+    *,
+    output_file: Path | None = None,
+    cache: ArtifactCache | None = None,
+) -> StageData:
+    """Run a chain of compilers concurrently, streaming data between them.
+
+    :param compilers: The compilers to run. They must all be `ToolCompiler`s, and each
+        one must consume the output stage of the previous one.
+    :param data: The input artifact.
+    :param output_file: Optional. A path to store the final artifact. If not given,
+        the artifact is written to a new `staging_path`, which the caller must
+        remove once it is done with it.
+    :param cache: Optional. A cache for the final artifact.
+    :returns: The artifact produced by the last compiler.
+    """
+    first, last = compilers[0], compilers[-1]
+    if data.stage != first.INPUT_STAGE:
+        raise InvalidStageError(data.stage, first.INPUT_STAGE)
+    output_stage = last.OUTPUT_STAGE
+    output_mode = output_stage.default_encoding()
+
+    cached = cache.lookup(output_stage, output_mode) if cache is not None else None
+    if cached is not None:
+        if output_file:
+            shutil.copy(cached, output_file)
+            cached = output_file
+        return StageData.from_path(output_stage, cached, output_mode)
+
+    input_path = data.data_path
+    if input_path is None:
+        input_path = _write_temp(data)
+    else:
+        prefetch_file(input_path)
+    output_path = output_file
+    if output_path is None:
+        output_path = staging_path(output_stage.file_suffix(output_mode))
+
+    try:
+        _run_pipeline(compilers, input_path, output_path)
+    except BaseException:
+        # Don't leave a partial artifact behind in the temporary directory.
+        if output_file is None:
+            output_path.unlink(missing_ok=True)
+        raise
+    finally:
+        if data.data_path is None:
+            input_path.unlink(missing_ok=True)
+
+    output = StageData.from_path(output_stage, output_path, output_mode)
+    if cache is not None:
+        cache.store(output)
+    return output
+
+
+def _run_pipeline(
+    compilers: Sequence[ToolCompiler],
+    input_path: Path,
+    output_path: Path,
+) -> None:
+    """Run the compilers as a process pipeline, and wait for them to finish."""
+    processes: list[_PipedProcess] = []
+    try:
+        _spawn_pipeline(compilers, input_path, output_path, processes)
+        _wait_pipeline(processes)
+    finally:
+        for _, _, proc, stderr in processes:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            stderr.close()
+
+
+def _spawn_pipeline(
+    compilers: Sequence[ToolCompiler],
+    input_path: Path,
+    output_path: Path,
+    processes: list[_PipedProcess],
+) -> None:
+    """Start the processes for each compiler, connecting them with pipes.
+
+    The started processes are appended to `processes`.
+    """
+    stdin: IO[bytes] | None = None
+    for i, compiler in enumerate(compilers):
+        is_last = i == len(compilers) - 1
+        cmd = compiler.command(
+            input_path if i == 0 else "-",
+            output_path if is_last else None,
+            compiler.OUTPUT_STAGE.default_encoding(),
+        )
+        LOGGER.info("Executing piped command: %s", CommandStr(cmd))
+        # Use files for stderr, so a verbose tool never blocks the pipeline.
+        stderr = tempfile.TemporaryFile()
+        try:
+            proc = subprocess.Popen(
+                cmd,  # noqa: S603
+                stdin=stdin,
+                stdout=subprocess.DEVNULL if is_last else subprocess.PIPE,
+                stderr=stderr,
+            )
+        except FileNotFoundError as err:
+            stderr.close()
+            raise compiler.tool_error(err) from err
+        if stdin is not None:
+            # Only the next process should hold the read end of the pipe.
+            stdin.close()
+        stdin = proc.stdout
+        processes.append((compiler, cmd, proc, stderr))
+
+
+def _wait_pipeline(processes: list[_PipedProcess]) -> None:
+    """Wait for all the processes to finish, raising an error if any failed.
+
+    When a process exits early, the previous ones are killed by a broken pipe.
+    Those are only reported if no other process failed.
+    """
+    failed = [process for process in processes if process[2].wait() != 0]
+    if not failed:
+        return
+    compiler, cmd, proc, stderr = next(
+        (process for process in failed if not _broken_pipe(process[2].returncode)),
+        failed[0],
+    )
+    stderr.seek(0)
+    err = CalledProcessError(proc.returncode, cmd, stderr=stderr.read())
+    raise compiler.tool_error(err) from err
+
+
+def _broken_pipe(returncode: int) -> bool:
+    """Whether a process was killed by writing to a closed pipe.
+
+    Shell wrappers report the signal as `128 + SIGPIPE`.
+    """
+    return returncode in (-signal.SIGPIPE, 128 + signal.SIGPIPE)
+
+
+def _default_encoded(compiler: StageCompiler, output_file: Path | None) -> bool:
+    """Whether the requested output file uses the stage's default encoding."""
+    if output_file is None:
+        return True
+    default = compiler.OUTPUT_STAGE.default_encoding()
+    return EncodingMode.from_file(output_file, compiler.OUTPUT_STAGE) in (
+        None,
+        default,
+    )
+
+
+def _write_temp(data: StageData) -> Path:
+    """Write some in-memory data to a new temporary file."""
+    path = staging_path(data.stage.file_suffix(data.encoding))
+    if isinstance(data.data, str):
+        path.write_text(data.data)
+    else:
+        path.write_bytes(data.data)
+    return path
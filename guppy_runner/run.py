@@ -1,10 +1,14 @@
 """Runner for the compiled guppy binary."""
 
 
+import os
 import subprocess
+import sys
 from pathlib import Path
+from typing import NoReturn
 
-from guppy_runner.util import LOGGER
+from guppy_runner.compile import remove_staging_dir
+from guppy_runner.util import LOGGER, CommandStr
 
 
 def run_guppy_bin(binary: Path) -> None:
@@ -13,13 +17,9 @@ def run_guppy_bin(binary: Path) -> None:
         binary.absolute(),
     ]
 
-    cmd_str = " ".join(str(c) for c in cmd)
-    msg = f"Executing command: '{cmd_str}'"
-    LOGGER.info(msg)
+    LOGGER.info("Executing command: %s", CommandStr(cmd))
 
-    print("----------------------")
-    print("Executing the program:")
-    print()
+    _print_header()
 
     out = subprocess.run(  # noqa: PLW1510
         cmd,  # noqa: S603
@@ -29,3 +29,28 @@ def run_guppy_bin(binary: Path) -> None:
     )
 
     print(out.stdout)
+
+
+def exec_guppy_bin(binary: Path) -> NoReturn:
+    """Replace the current process with the compiled guppy binary.
+
+    Unlike `run_guppy_bin`, the program's output is not captured, and its exit
+    code becomes the exit code of the process.
+    """
+    binary = binary.absolute()
+    LOGGER.info("Executing program: '%s'", binary)
+
+    # The interpreter's exit handlers don't run after the exec.
+    remove_staging_dir()
+
+    _print_header()
+    # Flush any pending output, it would be lost after the exec.
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.execv(binary, [binary])  # noqa: S606
+
+
+def _print_header() -> None:
+    print("----------------------")
+    print("Executing the program:")
+    print()
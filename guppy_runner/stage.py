@@ -3,15 +3,19 @@
 from __future__ import annotations
 
 import sys
-from enum import Enum
+from enum import Enum, IntEnum
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from pathlib import Path
 
 
-class Stage(Enum):
-    """The possible stages of a program compilation."""
+class Stage(IntEnum):
+    """The possible stages of a program compilation.
+
+    Stages are ordered by their position in the pipeline. Being an `IntEnum`, they
+    are compared natively as integers.
+    """
 
     # Input guppy program.
     GUPPY = 0
@@ -28,66 +32,18 @@ class Stage(Enum):
     # Executable file
     EXECUTABLE = 6
 
-    def __lt__(self, other: Stage) -> bool:
-        """Compare the stages."""
-        return self.value < other.value
-
-    def __le__(self, other: Stage) -> bool:
-        """Compare the stages."""
-        return self.value <= other.value
-
-    def __gt__(self, other: Stage) -> bool:
-        """Compare the stages."""
-        return self.value > other.value
-
-    def __ge__(self, other: Stage) -> bool:
-        """Compare the stages."""
-        return self.value >= other.value
+    # Keep the `Stage.NAME` string representation in all Python versions.
+    __str__ = Enum.__str__
 
-    def file_suffix(self, encoding: EncodingMode) -> str:  # noqa: PLR0911, C901
+    def file_suffix(self, encoding: EncodingMode) -> str:
         """Returns the file suffix for the stage."""
-        if self == Stage.GUPPY:
-            return ".py"
-
-        if self == Stage.HUGR and encoding == EncodingMode.BITCODE:
-            return ".msgpack"
-        if self == Stage.HUGR and encoding == EncodingMode.TEXTUAL:
-            return ".json"
-
-        if self == Stage.HUGR_MLIR and encoding == EncodingMode.BITCODE:
-            return ".mlirbc"
-        if self == Stage.HUGR_MLIR and encoding == EncodingMode.TEXTUAL:
-            return ".mlir"
-
-        if self == Stage.LOWERED_MLIR and encoding == EncodingMode.BITCODE:
-            return ".mlirbc"
-        if self == Stage.LOWERED_MLIR and encoding == EncodingMode.TEXTUAL:
-            return ".mlir"
-
-        if self == Stage.LLVM and encoding == EncodingMode.BITCODE:
-            return ".bc"
-        if self == Stage.LLVM and encoding == EncodingMode.TEXTUAL:
-            return ".ll"
-
-        if self == Stage.OBJECT:
-            return ".o"
-
-        if self == Stage.EXECUTABLE:
-            return ".out"
-
-        return ""
+        if self in _FIXED_SUFFIXES:
+            return _FIXED_SUFFIXES[self]
+        return _ENCODED_SUFFIXES.get((self, encoding), "")
 
     def default_encoding(self) -> EncodingMode:
         """Returns the default file encoding for the stage."""
-        return {
-            Stage.GUPPY: EncodingMode.TEXTUAL,
-            Stage.HUGR: EncodingMode.TEXTUAL,
-            Stage.HUGR_MLIR: EncodingMode.TEXTUAL,
-            Stage.LOWERED_MLIR: EncodingMode.TEXTUAL,
-            Stage.LLVM: EncodingMode.TEXTUAL,
-            Stage.OBJECT: EncodingMode.BITCODE,
-            Stage.EXECUTABLE: EncodingMode.BITCODE,
-        }[self]
+        return _DEFAULT_ENCODINGS[self]
 
 
 class EncodingMode(Enum):
@@ -101,40 +57,11 @@ class EncodingMode(Enum):
     TEXTUAL = 1
 
     @staticmethod
-    def from_file(file: Path, stage: Stage) -> EncodingMode | None:  # noqa: PLR0911, C901
+    def from_file(file: Path, stage: Stage) -> EncodingMode | None:
         """Try to derive the encoding mode from a file extension."""
-        ext = file.suffix
-
-        if stage == Stage.GUPPY:
-            return EncodingMode.TEXTUAL
-
-        if stage == Stage.HUGR and ext == ".msgpack":
-            return EncodingMode.BITCODE
-        if stage == Stage.HUGR and ext == ".json":
-            return EncodingMode.TEXTUAL
-
-        if stage == Stage.HUGR_MLIR and ext == ".mlirbc":
-            return EncodingMode.BITCODE
-        if stage == Stage.HUGR_MLIR and ext == ".mlir":
-            return EncodingMode.TEXTUAL
-
-        if stage == Stage.LOWERED_MLIR and ext == ".mlirbc":
-            return EncodingMode.BITCODE
-        if stage == Stage.LOWERED_MLIR and ext == ".mlir":
-            return EncodingMode.TEXTUAL
-
-        if stage == Stage.LLVM and ext == ".bc":
-            return EncodingMode.BITCODE
-        if stage == Stage.LLVM and ext == ".ll":
-            return EncodingMode.TEXTUAL
-
-        if stage == Stage.OBJECT:
-            return EncodingMode.BITCODE
-
-        if stage == Stage.EXECUTABLE:
-            return EncodingMode.BITCODE
-
-        return None
+        if stage in _FIXED_ENCODINGS:
+            return _FIXED_ENCODINGS[stage]
+        return _EXTENSION_ENCODINGS.get((stage, file.suffix))
 
     @staticmethod
     def from_data(data: str | bytes) -> EncodingMode:
@@ -144,8 +71,57 @@ class EncodingMode(Enum):
         return EncodingMode.BITCODE
 
 
+# The default file encoding of each stage.
+_DEFAULT_ENCODINGS: dict[Stage, EncodingMode] = {
+    Stage.GUPPY: EncodingMode.TEXTUAL,
+    # Hugrs are encoded in msgpack unless json is explicitly requested.
+    Stage.HUGR: EncodingMode.BITCODE,
+    Stage.HUGR_MLIR: EncodingMode.TEXTUAL,
+    Stage.LOWERED_MLIR: EncodingMode.TEXTUAL,
+    Stage.LLVM: EncodingMode.TEXTUAL,
+    Stage.OBJECT: EncodingMode.BITCODE,
+    Stage.EXECUTABLE: EncodingMode.BITCODE,
+}
+
+# File suffixes for stages whose artifacts always use the same encoding.
+_FIXED_SUFFIXES: dict[Stage, str] = {
+    Stage.GUPPY: ".py",
+    Stage.OBJECT: ".o",
+    Stage.EXECUTABLE: ".out",
+}
+
+# File suffixes for the artifacts of each stage, by encoding mode.
+_ENCODED_SUFFIXES: dict[tuple[Stage, EncodingMode], str] = {
+    (Stage.HUGR, EncodingMode.BITCODE): ".msgpack",
+    (Stage.HUGR, EncodingMode.TEXTUAL): ".json",
+    (Stage.HUGR_MLIR, EncodingMode.BITCODE): ".mlirbc",
+    (Stage.HUGR_MLIR, EncodingMode.TEXTUAL): ".mlir",
+    (Stage.LOWERED_MLIR, EncodingMode.BITCODE): ".mlirbc",
+    (Stage.LOWERED_MLIR, EncodingMode.TEXTUAL): ".mlir",
+    (Stage.LLVM, EncodingMode.BITCODE): ".bc",
+    (Stage.LLVM, EncodingMode.TEXTUAL): ".ll",
+}
+
+# Stages whose artifacts always use the same encoding, regardless of extension.
+_FIXED_ENCODINGS: dict[Stage, EncodingMode] = {
+    Stage.GUPPY: EncodingMode.TEXTUAL,
+    Stage.OBJECT: EncodingMode.BITCODE,
+    Stage.EXECUTABLE: EncodingMode.BITCODE,
+}
+
+# The encoding mode of each recognised (stage, file extension) pair.
+_EXTENSION_ENCODINGS: dict[tuple[Stage, str], EncodingMode] = {
+    (stage, suffix): encoding for (stage, encoding), suffix in _ENCODED_SUFFIXES.items()
+}
+
+
 class StageData:
-    """The data describing a compilation artifact in a given stage."""
+    """The data describing a compilation artifact in a given stage.
+
+    The artifact may be held in memory, stored in a file, or both.
+    """
+
+    __slots__ = ("stage", "encoding", "_data", "data_path")
 
     stage: Stage
     encoding: EncodingMode
@@ -183,9 +159,15 @@ class StageData:
         stage: Stage,
         encoding: EncodingMode,
     ) -> StageData:
-        """Initialize the data, reading from stdin."""
-        assert encoding == EncodingMode.TEXTUAL
-        data = sys.stdin.read()
+        """Initialize the data, reading from stdin.
+
+        Bitcode data is read as raw bytes, without decoding it.
+        """
+        data: str | bytes
+        if encoding == EncodingMode.TEXTUAL:
+            data = sys.stdin.read()
+        else:
+            data = sys.stdin.buffer.read()
         return cls(stage, data, encoding)
 
     @property
@@ -194,16 +176,18 @@ class StageData:
 
         If the data was specified as a path, load it.
         """
-        if self._data is None:
-            self.load_data()
-        assert self._data is not None
-        return self._data
+        if self._data is not None:
+            return self._data
+        return self.load_data()
+
+    def load_data(self) -> str | bytes:
+        """If the data is a path, load it.
 
-    def load_data(self) -> None:
-        """If the data is a path, load it."""
+        :returns: The loaded data.
+        """
         if self._data is not None:
             # Already loaded.
-            return
+            return self._data
         if self.data_path is None:
             msg = "No data path to load."
             raise ValueError(msg)
@@ -211,3 +195,4 @@ class StageData:
             self._data = self.data_path.read_text()
         else:
             self._data = self.data_path.read_bytes()
+        return self._data
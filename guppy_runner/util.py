@@ -1,5 +1,30 @@
 """Utility functions and definitions for guppy_runner."""
 
+from __future__ import annotations
+
 import logging
+import shlex
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from pathlib import Path
 
 LOGGER = logging.getLogger(__name__)
+
+
+class CommandStr:
+    """A command line, formatted for logging.
+
+    The command is only joined into a string if the log record is emitted.
+    """
+
+    cmd: Sequence[str | Path]
+
+    def __init__(self, cmd: Sequence[str | Path]) -> None:
+        """Initialize the command string."""
+        self.cmd = cmd
+
+    def __str__(self) -> str:
+        """Returns the shell-escaped command line."""
+        return shlex.join(str(c) for c in self.cmd)
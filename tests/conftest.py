@@ -0,0 +1,48 @@
+"""Shared fixtures for the tests."""
+
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+# Copies the input file (or stdin, for "-") to the `-o` output file, or to stdout.
+# Mimics the command line of the MLIR and LLVM tools.
+_COPY_SCRIPT = """\
+in=; out=-
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -o) out="$2"; shift ;;
+        -) in=- ;;
+        -*) ;;
+        *) [ -z "$in" ] && in="$1" ;;
+    esac
+    shift
+done
+if [ "$out" = - ]; then cat "$in"; else cat "$in" > "$out"; fi
+"""
+
+
+@pytest.fixture()
+def fake_tool(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Callable[..., Path]:
+    """Replace an external tool with a script that copies its input to its output.
+
+    The returned function takes the env variable that selects the tool, and
+    optionally some shell commands to run before copying. It returns the path to a
+    file where each invocation of the tool is logged, one line per call.
+    """
+
+    def make_tool(env_var: str, prelude: str = "") -> Path:
+        tool = tmp_path / env_var.lower()
+        calls = tmp_path / f"{env_var.lower()}.calls"
+        calls.touch()
+        tool.write_text(
+            f'#!/bin/sh\necho "$@" >> {calls}\n{prelude}\n{_COPY_SCRIPT}',
+        )
+        tool.chmod(0o755)
+        monkeypatch.setenv(env_var, str(tool))
+        return calls
+
+    return make_tool
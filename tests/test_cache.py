@@ -0,0 +1,194 @@
+"""Tests for the compiled artifact cache."""
+
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from guppy_runner import compile_guppy_from_stage
+from guppy_runner.cache import (
+    GUPPY_CACHE_ENV,
+    XDG_CACHE_HOME_ENV,
+    ArtifactCache,
+    compute_cache_key,
+    prune_cache,
+)
+from guppy_runner.compile import tool_signature
+from guppy_runner.compile.guppy_compiler import GuppyCompiler
+from guppy_runner.compile.hugr_compiler import HUGR_MLIR_TRANSLATE_ENV, HugrCompiler
+from guppy_runner.compile.linker import QIR_BACKEND_LIBS_ENV, Linker
+from guppy_runner.compile.mlir_compiler import MLIR_TRANSLATE_ENV
+from guppy_runner.stage import EncodingMode, Stage, StageData
+
+
+def test_cache_key():
+    program = StageData(Stage.GUPPY, "print('hello')", EncodingMode.TEXTUAL)
+    other = StageData(Stage.GUPPY, "print('world')", EncodingMode.TEXTUAL)
+    compilers = [GuppyCompiler(), HugrCompiler()]
+
+    key = compute_cache_key(program, compilers)
+    assert key == compute_cache_key(program, compilers)
+    assert key != compute_cache_key(other, compilers)
+    assert key != compute_cache_key(program, compilers[:1])
+
+
+def test_store_and_lookup(tmp_path: Path):
+    cache = ArtifactCache("key", root=tmp_path)
+    assert cache.lookup(Stage.HUGR_MLIR, EncodingMode.TEXTUAL) is None
+
+    cache.store(StageData(Stage.HUGR_MLIR, "module {}", EncodingMode.TEXTUAL))
+    cache.flush()
+    cached = cache.lookup(Stage.HUGR_MLIR, EncodingMode.TEXTUAL)
+    assert cached is not None
+    assert cached.read_text() == "module {}"
+
+    # Artifacts are keyed by their encoding.
+    assert cache.lookup(Stage.HUGR_MLIR, EncodingMode.BITCODE) is None
+    assert cache.lookup(Stage.LOWERED_MLIR, EncodingMode.TEXTUAL) is None
+
+
+def test_store_error(tmp_path: Path):
+    cache = ArtifactCache("key", root=tmp_path)
+    missing = tmp_path / "missing.ll"
+    cache.store(StageData.from_path(Stage.LLVM, missing, EncodingMode.TEXTUAL))
+    cache.flush()
+
+    # Failed writes are skipped, without leaving temporary files behind.
+    assert cache.lookup(Stage.LLVM, EncodingMode.TEXTUAL) is None
+    assert list(cache.path.iterdir()) == []
+
+
+def test_prune_cache(tmp_path: Path):
+    caches = [ArtifactCache(f"key{i}", root=tmp_path) for i in range(3)]
+    for i, cache in enumerate(caches):
+        cache.store(StageData(Stage.LLVM, "x" * 100, EncodingMode.TEXTUAL))
+        cache.flush()
+        os.utime(cache.path, ns=(i, i))
+
+    # Using an entry makes it the most recently used.
+    assert caches[0].lookup(Stage.LLVM, EncodingMode.TEXTUAL) is not None
+
+    prune_cache(tmp_path, 250)
+    assert [cache.path.exists() for cache in caches] == [True, False, True]
+
+    # The entry in use is never removed.
+    prune_cache(tmp_path, 0, keep=caches[2].path)
+    assert [cache.path.exists() for cache in caches] == [False, False, True]
+
+
+def test_tool_signature(tmp_path: Path):
+    tool = tmp_path / "tool"
+    tool.write_text("#!/bin/sh\n")
+    tool.chmod(0o755)
+
+    signature = tool_signature(tool)
+    assert signature.startswith(str(tool))
+
+    # Updating the tool invalidates the signature.
+    tool.write_text("#!/bin/sh\nexit 0\n")
+    assert tool_signature(tool) != signature
+
+    missing = tmp_path / "missing"
+    assert tool_signature(missing) == str(missing)
+
+
+def test_linker_signature(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(QIR_BACKEND_LIBS_ENV, str(tmp_path))
+    lib = tmp_path / "libqir_backend.a"
+    lib.write_bytes(b"old")
+    signature = Linker().signature()
+
+    # Rebuilding the backend library invalidates the linked binaries.
+    lib.write_bytes(b"newer")
+    assert Linker().signature() != signature
+
+
+def test_cache_sharding(tmp_path: Path):
+    cache = ArtifactCache("0123abcd", root=tmp_path)
+    assert cache.path == tmp_path / "01" / "23abcd"
+
+
+@pytest.fixture()
+def _enable_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Enable the artifact cache, in a temporary directory."""
+    monkeypatch.setenv(GUPPY_CACHE_ENV, "1")
+    monkeypatch.setenv(XDG_CACHE_HOME_ENV, str(tmp_path / "cache"))
+
+
+@pytest.mark.usefixtures("_enable_cache")
+def test_compile_cached(tmp_path: Path, fake_tool: Callable[..., Path]):
+    calls = fake_tool(MLIR_TRANSLATE_ENV)
+    program = StageData(Stage.LOWERED_MLIR, "module {}", EncodingMode.TEXTUAL)
+
+    for i in range(2):
+        output = compile_guppy_from_stage(
+            program,
+            llvm_out=tmp_path / f"out{i}.ll",
+            no_run=True,
+        )
+        assert output is not None
+        assert (tmp_path / f"out{i}.ll").read_text() == "module {}"
+
+    # The second run is served from the cache.
+    assert len(calls.read_text().splitlines()) == 1
+
+
+@pytest.mark.usefixtures("_enable_cache")
+def test_compile_cached_from_hugr(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fake_tool: Callable[..., Path],
+):
+    calls = fake_tool(HUGR_MLIR_TRANSLATE_ENV)
+    # Both programs compile to the same Hugr.
+    guppy_runs = []
+
+    def fake_guppy(
+        _self: GuppyCompiler,
+        data: str,
+        *_args: object,
+        **_kwargs: object,
+    ) -> bytes:
+        guppy_runs.append(data)
+        return b"hugr"
+
+    monkeypatch.setattr(GuppyCompiler, "_translate_data", fake_guppy)
+
+    for i, source in enumerate(["x = 1", "x = 2"]):
+        program = StageData(Stage.GUPPY, source, EncodingMode.TEXTUAL)
+        output = compile_guppy_from_stage(
+            program,
+            hugr_mlir_out=tmp_path / f"out{i}.mlir",
+            no_run=True,
+        )
+        assert output is not None
+        assert (tmp_path / f"out{i}.mlir").read_text() == "hugr"
+
+    # The Guppy front-end always runs, but the translation of the Hugr is cached.
+    assert guppy_runs == ["x = 1", "x = 2"]
+    assert len(calls.read_text().splitlines()) == 1
+
+
+@pytest.mark.usefixtures("_enable_cache")
+def test_compile_cached_skips_earlier_stages(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fake_tool: Callable[..., Path],
+):
+    fake_tool(MLIR_TRANSLATE_ENV)
+
+    # Only the compilers that run contribute to the cache key.
+    def no_signature(_self: object) -> str:
+        raise AssertionError
+
+    monkeypatch.setattr(GuppyCompiler, "signature", no_signature)
+    monkeypatch.setattr(HugrCompiler, "signature", no_signature)
+
+    program = StageData(Stage.LOWERED_MLIR, "module {}", EncodingMode.TEXTUAL)
+    output = compile_guppy_from_stage(
+        program,
+        llvm_out=tmp_path / "out.ll",
+        no_run=True,
+    )
+    assert output is not None
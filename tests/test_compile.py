@@ -0,0 +1,193 @@
+"""Tests for the stage compilers, using stand-in tool binaries."""
+
+import importlib.util
+import os
+import sys
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from guppy_runner import RunOptions, compile_guppy_many
+from guppy_runner.cache import GUPPY_CACHE_ENV
+from guppy_runner.compile import guppy_compiler, staging_path, stderr_first_line
+from guppy_runner.compile.hugr_compiler import (
+    HUGR_MLIR_TRANSLATE_ENV,
+    HugrCompiler,
+    MlirTranslateError,
+)
+from guppy_runner.compile.linker import Linker
+from guppy_runner.compile.mlir_compiler import MLIR_TRANSLATE_ENV, MLIRCompiler
+from guppy_runner.compile.mlir_lowerer import HUGR_MLIR_OPT_ENV, MLIRLowerer
+from guppy_runner.run import exec_guppy_bin
+from guppy_runner.stage import EncodingMode, Stage, StageData
+
+
+def test_run_many(tmp_path: Path, fake_tool: Callable[..., Path]):
+    calls = fake_tool(MLIR_TRANSLATE_ENV)
+    datas = [
+        StageData(Stage.LOWERED_MLIR, f"module {i}", EncodingMode.TEXTUAL)
+        for i in range(4)
+    ]
+    output_files = [None, tmp_path / "out.ll", None, None]
+
+    outputs = MLIRCompiler().run_many(datas, output_files=output_files)
+
+    assert [out.stage for out in outputs] == [Stage.LLVM] * 4
+    assert [out.data for out in outputs] == [f"module {i}" for i in range(4)]
+    assert (tmp_path / "out.ll").read_text() == "module 1"
+    # The in-memory inputs are piped to the tool, which writes the stored
+    # artifact directly.
+    assert f"- --mlir-to-llvmir -o {tmp_path / 'out.ll'}" in calls.read_text()
+
+
+def test_compile_many(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fake_tool: Callable[..., Path],
+):
+    fake_tool(MLIR_TRANSLATE_ENV)
+    monkeypatch.setenv(GUPPY_CACHE_ENV, "0")
+    programs = [
+        StageData(Stage.LOWERED_MLIR, f"module {i}", EncodingMode.TEXTUAL)
+        for i in range(4)
+    ]
+    options = [
+        RunOptions(no_run=True, llvm_out=tmp_path / f"out{i}.ll") for i in range(4)
+    ]
+
+    outputs = compile_guppy_many(programs, options)
+
+    for i, out in enumerate(outputs):
+        assert out is not None
+        assert out.stage == Stage.LLVM
+        assert (tmp_path / f"out{i}.ll").read_text() == f"module {i}"
+
+    with pytest.raises(ValueError, match="distinct files"):
+        compile_guppy_many(programs[:2], [options[0], options[0]])
+    with pytest.raises(ValueError, match="one set of options"):
+        compile_guppy_many(programs, options[:2])
+
+
+@pytest.mark.parametrize(
+    ("stderr", "expected"),
+    [
+        (None, ""),
+        ("", ""),
+        ("error: bad input\nmore details\n", "error: bad input"),
+        (b"error: bad input\r\nmore details", "error: bad input"),
+        (b"\xff error", "� error"),
+    ],
+)
+def test_stderr_first_line(stderr: str | bytes | None, expected: str):
+    assert stderr_first_line(stderr) == expected
+
+
+def test_lower_many(fake_tool: Callable[..., Path]):
+    calls = fake_tool(HUGR_MLIR_OPT_ENV)
+
+    datas = [
+        StageData(Stage.HUGR_MLIR, f"module {i}\n", EncodingMode.TEXTUAL)
+        for i in range(3)
+    ]
+    outputs = MLIRLowerer().run_many(datas)
+
+    assert [out.stage for out in outputs] == [Stage.LOWERED_MLIR] * 3
+    assert [out.data.strip() for out in outputs] == [f"module {i}" for i in range(3)]
+    assert calls.read_text().splitlines() == ["- --lower-hugr --split-input-file"]
+
+
+def test_translate_hugr_error(fake_tool: Callable[..., Path]):
+    calls = fake_tool(HUGR_MLIR_TRANSLATE_ENV, 'echo "error: invalid Hugr" >&2; exit 1')
+
+    # Errors unrelated to stdin are raised without retrying with a file.
+    compiler = HugrCompiler()
+    data = StageData(Stage.HUGR, "{}", EncodingMode.TEXTUAL)
+    with pytest.raises(MlirTranslateError, match="invalid Hugr"):
+        compiler.run(data)
+    assert len(calls.read_text().splitlines()) == 1
+    assert compiler._stdin_supported  # noqa: SLF001
+
+
+def test_translate_hugr_main(fake_tool: Callable[..., Path]):
+    fake_tool(HUGR_MLIR_TRANSLATE_ENV)
+
+    # Only the `main` function is made public.
+    mlir = "func @main_helper()\nfunc @main()\n"
+    output = HugrCompiler().run(StageData(Stage.HUGR, mlir, EncodingMode.TEXTUAL))
+    assert output.data == "func @main_helper()\nfunc public @main()\n"
+
+
+def test_link_many_requires_outputs(tmp_path: Path):
+    objects = [
+        StageData.from_path(Stage.OBJECT, tmp_path / f"out{i}.o", EncodingMode.BITCODE)
+        for i in range(2)
+    ]
+    with pytest.raises(ValueError, match="own output file"):
+        Linker().run_many(objects)
+    with pytest.raises(ValueError, match="own output file"):
+        Linker().run_many(objects, output_files=[tmp_path / "a", None])
+
+
+def test_compile_file_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(sys, "dont_write_bytecode", False)
+    program = tmp_path / "program.py"
+    program.write_text("x = 1\n")
+
+    code = guppy_compiler._compile_file(program)  # noqa: SLF001
+    assert guppy_compiler._compile_file(program) is code  # noqa: SLF001
+    # The bytecode is written to `__pycache__` for the next runs.
+    assert Path(importlib.util.cache_from_source(str(program))).exists()
+
+    # Modifying the file invalidates the cached code.
+    program.write_text("x = 22\n")
+    assert guppy_compiler._compile_file(program) is not code  # noqa: SLF001
+
+
+def test_staging_path():
+    first = staging_path(".mlir")
+    second = staging_path(".mlir")
+    assert first != second
+    assert first.parent == second.parent
+    assert first.parent.is_dir()
+    assert first.suffix == ".mlir"
+
+    # Concurrent stages share the same directory.
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        paths = list(executor.map(staging_path, [".ll"] * 32))
+    assert {path.parent for path in paths} == {first.parent}
+
+
+def test_exec_removes_staging_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    staged = staging_path(".o")
+    staged.write_bytes(b"object")
+    executed = []
+    monkeypatch.setattr(os, "execv", lambda path, _: executed.append(path))
+
+    exec_guppy_bin(tmp_path / "program")
+
+    assert executed == [tmp_path / "program"]
+    assert not staged.parent.exists()
+    # A new directory is created on demand.
+    assert staging_path(".o").parent.is_dir()
+
+
+@pytest.mark.parametrize("stdin_supported", [True, False])
+def test_translate_hugr_stdin(
+    fake_tool: Callable[..., Path],
+    stdin_supported: bool,  # noqa: FBT001
+):
+    fake_tool(
+        HUGR_MLIR_TRANSLATE_ENV,
+        ""
+        if stdin_supported
+        else """[ "$2" = - ] && { echo "error: '-': No such file" >&2; exit 1; }""",
+    )
+
+    compiler = HugrCompiler()
+    data = StageData(Stage.HUGR, "func @main()", EncodingMode.TEXTUAL)
+    for _ in range(2):
+        output = compiler.run(data)
+        assert output.data == "func public @main()"
+    assert compiler._stdin_supported == stdin_supported  # noqa: SLF001
@@ -0,0 +1,96 @@
+"""Tests for the command line interface."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+from guppy_runner import RunOptions
+from guppy_runner import __main__ as cli
+from guppy_runner.stage import EncodingMode, Stage, StageData
+
+
+def test_run_options():
+    args = cli.parse_args(
+        [
+            "program.py",
+            "--module",
+            "my_module",
+            "--store-hugr",
+            "out.json",
+            "--store-llvm",
+            "out.ll",
+            "--no-run",
+            "--pipeline",
+        ],
+    )
+    assert args.input_stage == Stage.GUPPY
+    assert args.input_encoding == EncodingMode.TEXTUAL
+    assert cli.get_run_options(args) == RunOptions(
+        hugr_out=Path("out.json"),
+        llvm_out=Path("out.ll"),
+        no_run=True,
+        module_name="my_module",
+        pipeline=True,
+    )
+
+
+def test_input_stage():
+    args = cli.parse_args(["program.mlirbc", "--hugr-mlir"])
+    assert args.input_stage == Stage.HUGR_MLIR
+    assert args.input_encoding == EncodingMode.BITCODE
+
+    args = cli.parse_args(["--llvm", "--textual"])
+    assert args.input is None
+    assert args.input_stage == Stage.LLVM
+    assert args.input_encoding == EncodingMode.TEXTUAL
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["program.ll", "--llvm", "--store-hugr", "out.json"],
+        ["program.ll", "--llvm", "--store-llvm", "out.ll"],
+        ["program.mlir", "--llvm-mlir", "--store-hugr-mlir", "out.mlir"],
+        ["program.py", "--hugr", "--llvm"],
+        ["program.py", "--bitcode", "--textual"],
+    ],
+)
+def test_invalid_args(argv: list[str]):
+    with pytest.raises(SystemExit) as exc_info:
+        cli.parse_args(argv)
+    assert exc_info.value.code == 2
+
+
+def test_main_exec(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    binary = tmp_path / "program"
+    compiled: list[tuple[StageData, RunOptions]] = []
+    executed: list[Path] = []
+
+    def compile_program(program: StageData, options: RunOptions) -> StageData:
+        compiled.append((program, options))
+        return StageData.from_path(Stage.EXECUTABLE, binary, EncodingMode.BITCODE)
+
+    monkeypatch.setattr(cli, "compile_guppy_from_stage", compile_program)
+    monkeypatch.setattr(cli, "exec_guppy_bin", executed.append)
+    monkeypatch.setattr(sys, "argv", ["guppy-runner", "program.ll", "--llvm"])
+
+    cli.main()
+
+    [(program, options)] = compiled
+    assert program.stage == Stage.LLVM
+    assert program.data_path == Path("program.ll")
+    assert options == RunOptions()
+    assert executed == [binary]
+
+
+def test_main_error(monkeypatch: pytest.MonkeyPatch):
+    executed: list[Path] = []
+    monkeypatch.setattr(cli, "compile_guppy_from_stage", lambda *_args: None)
+    monkeypatch.setattr(cli, "exec_guppy_bin", executed.append)
+    monkeypatch.setattr(sys, "argv", ["guppy-runner", "program.py"])
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main()
+    assert exc_info.value.code == 1
+    assert not executed
@@ -0,0 +1,119 @@
+"""Tests for the process pipelines, using stand-in tool binaries."""
+
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from guppy_runner import compile_guppy_from_stage
+from guppy_runner.cache import GUPPY_CACHE_ENV
+from guppy_runner.compile import _resolve_tool, staging_path
+from guppy_runner.compile.hugr_compiler import HugrCompiler
+from guppy_runner.compile.linker import QIR_BACKEND_LIBS_ENV, Linker
+from guppy_runner.compile.llvm_compiler import LLC_ENV, LlcError, LlvmCompiler
+from guppy_runner.compile.mlir_compiler import MLIR_TRANSLATE_ENV, MLIRCompiler
+from guppy_runner.compile.mlir_lowerer import HUGR_MLIR_OPT_ENV, MLIRLowerer
+from guppy_runner.compile.pipeline import pipeline_segments, run_piped
+from guppy_runner.stage import EncodingMode, Stage, StageData
+
+LOWERER = MLIRLowerer()
+TRANSLATOR = MLIRCompiler()
+LLC = LlvmCompiler()
+
+PROGRAM = StageData(Stage.HUGR_MLIR, "module {}\n", EncodingMode.TEXTUAL)
+
+
+@pytest.fixture()
+def fake_tools(fake_tool: Callable[..., Path]) -> list[Path]:
+    """Replace the piped tools with stand-ins, returning their call logs."""
+    return [fake_tool(env) for env in (HUGR_MLIR_OPT_ENV, MLIR_TRANSLATE_ENV, LLC_ENV)]
+
+
+def _staged_files() -> set[Path]:
+    """The files currently in the staging directory."""
+    return set(staging_path("").parent.iterdir())
+
+
+def test_pipeline_segments(tmp_path: Path):
+    hugr, linker = HugrCompiler(), Linker()
+    obj = tmp_path / "out.o"
+    bytecode = tmp_path / "out.mlirbc"
+
+    segments = pipeline_segments(
+        [(hugr, None), (LOWERER, None), (TRANSLATOR, None), (LLC, obj), (linker, None)],
+    )
+    assert segments == [
+        [(hugr, None)],
+        [(LOWERER, None), (TRANSLATOR, None), (LLC, obj)],
+        [(linker, None)],
+    ]
+
+    # Stored artifacts end a segment, and non-default encodings are run alone.
+    segments = pipeline_segments(
+        [(LOWERER, bytecode), (TRANSLATOR, tmp_path / "out.ll"), (LLC, None)],
+    )
+    assert segments == [
+        [(LOWERER, bytecode)],
+        [(TRANSLATOR, tmp_path / "out.ll")],
+        [(LLC, None)],
+    ]
+
+
+def test_run_piped(tmp_path: Path, fake_tools: list[Path]):
+    before = _staged_files()
+    output = run_piped(
+        [LOWERER, TRANSLATOR, LLC],
+        PROGRAM,
+        output_file=tmp_path / "out.o",
+    )
+
+    assert output.stage == Stage.OBJECT
+    assert output.data_path == tmp_path / "out.o"
+    assert output.data == b"module {}\n"
+    for calls in fake_tools:
+        assert len(calls.read_text().splitlines()) == 1
+    # The spilled input is removed.
+    assert _staged_files() == before
+
+
+def test_run_piped_error(fake_tool: Callable[..., Path], fake_tools: list[Path]):
+    _ = fake_tools
+    fake_tool(LLC_ENV, 'echo "error: bad input" >&2; exit 1')
+
+    before = _staged_files()
+    with pytest.raises(LlcError, match="error: bad input"):
+        run_piped([LOWERER, TRANSLATOR, LLC], PROGRAM)
+    # Neither the spilled input nor the partial output are left behind.
+    assert _staged_files() == before
+
+
+@pytest.mark.usefixtures("fake_tools")
+def test_compile_piped(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fake_tool: Callable[..., Path],
+):
+    # `clang` has no env variable override, so put the stand-in in the PATH.
+    fake_tool("CLANG")
+    monkeypatch.setenv("PATH", f"{tmp_path}:{os.environ['PATH']}")
+    monkeypatch.setenv(QIR_BACKEND_LIBS_ENV, str(tmp_path))
+    monkeypatch.setenv(GUPPY_CACHE_ENV, "0")
+    _resolve_tool.cache_clear()
+
+    before = _staged_files()
+    try:
+        output = compile_guppy_from_stage(
+            PROGRAM,
+            pipeline=True,
+            bin_out=tmp_path / "program",
+            no_run=True,
+        )
+    finally:
+        _resolve_tool.cache_clear()
+
+    assert output is not None
+    assert output.data_path == tmp_path / "program"
+    assert output.data == b"module {}\n"
+    # The intermediary object piped out of `llc` is removed after linking.
+    assert _staged_files() == before
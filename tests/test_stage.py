@@ -0,0 +1,57 @@
+"""Tests for the compilation stage definitions."""
+
+import io
+from pathlib import Path
+
+import pytest
+
+from guppy_runner.stage import EncodingMode, Stage, StageData
+
+
+@pytest.mark.parametrize(
+    ("file", "stage", "expected"),
+    [
+        ("prog.py", Stage.GUPPY, EncodingMode.TEXTUAL),
+        ("prog.msgpack", Stage.HUGR, EncodingMode.BITCODE),
+        ("prog.json", Stage.HUGR, EncodingMode.TEXTUAL),
+        ("prog.mlirbc", Stage.LOWERED_MLIR, EncodingMode.BITCODE),
+        ("prog.ll", Stage.LLVM, EncodingMode.TEXTUAL),
+        ("prog.bc", Stage.LLVM, EncodingMode.BITCODE),
+        ("prog", Stage.OBJECT, EncodingMode.BITCODE),
+        ("prog.ll", Stage.HUGR, None),
+        ("prog", Stage.LLVM, None),
+    ],
+)
+def test_encoding_from_file(file: str, stage: Stage, expected: EncodingMode | None):
+    assert EncodingMode.from_file(Path(file), stage) == expected
+
+
+@pytest.mark.parametrize(
+    ("encoding", "expected"),
+    [(EncodingMode.TEXTUAL, "\x93hugr"), (EncodingMode.BITCODE, b"\x93hugr")],
+)
+def test_from_stdin(
+    monkeypatch: pytest.MonkeyPatch,
+    encoding: EncodingMode,
+    expected: str | bytes,
+):
+    stdin = io.TextIOWrapper(io.BytesIO(b"\x93hugr"), encoding="latin-1")
+    monkeypatch.setattr("sys.stdin", stdin)
+
+    data = StageData.from_stdin(Stage.HUGR, encoding)
+    assert data.data == expected
+    assert data.data_path is None
+
+
+def test_file_suffix():
+    assert Stage.GUPPY.file_suffix(EncodingMode.BITCODE) == ".py"
+    assert Stage.HUGR.file_suffix(EncodingMode.BITCODE) == ".msgpack"
+    assert Stage.LOWERED_MLIR.file_suffix(EncodingMode.TEXTUAL) == ".mlir"
+    assert Stage.EXECUTABLE.file_suffix(EncodingMode.TEXTUAL) == ".out"
+
+    # The suffixes map back to the same encoding.
+    for stage in Stage:
+        for encoding in EncodingMode:
+            path = Path("prog").with_suffix(stage.file_suffix(encoding))
+            detected = EncodingMode.from_file(path, stage)
+            assert detected in (encoding, stage.default_encoding())